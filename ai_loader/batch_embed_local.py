@@ -1,9 +1,16 @@
 # ai_loader/batch_embed_local.py
 
 import os
+import queue
+import threading
+import time
+from datetime import datetime
 from tqdm import tqdm
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from sentence_transformers import SentenceTransformer
+from collection_version import bump_collection_version
+from embedding_state import STATE_PROJECTION, artifact_text, embedding_fields, needs_embedding
+from pipeline import DONE, QUEUE_DEPTH, read_batches, write_batches
 
 # --- MongoDB from env vars ---
 MONGO_URI = os.environ.get("MONGO_URI")
@@ -11,34 +18,70 @@ DB_NAME = os.environ.get("MONGO_DB_NAME")
 COLLECTION = os.environ.get("MONGO_COLLECTION")
 
 # --- Config ---
-BATCH_SIZE = 32
-SKIP_IF_PRESENT = True  # Set to False to always re-embed
-
-# --- Load Model ---
-model = SentenceTransformer("all-MiniLM-L6-v2")
-
-# --- Connect to MongoDB ---
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-coll = db[COLLECTION]
-
-# --- Get all docs (that need embedding, if desired) ---
-query = {} if not SKIP_IF_PRESENT else {"embedding": {"$exists": False}}
-total = coll.count_documents(query)
-cursor = coll.find(query)
-
-print(f"Embedding {total} artifacts...")
-
-for doc in tqdm(cursor, total=total):
-    text = " ".join([
-        doc.get("title", ""),
-        doc.get("description", ""),
-        doc.get("region", "")
-    ])
-    embedding = model.encode(text).tolist()
-    coll.update_one(
-        {"_id": doc["_id"]},
-        {"$set": {"embedding": embedding}}
-    )
-
-print("Batch embedding complete. MongoDB search/text index remains unchanged.")
\ No newline at end of file
+MODEL_NAME = "all-MiniLM-L6-v2"
+BATCH_SIZE = 32          # Texts per model.encode call
+WRITE_BATCH_SIZE = 500   # UpdateOne operations per bulk_write
+SKIP_IF_PRESENT = True  # Only re-embed docs whose text or model changed; False re-embeds all
+
+# --- Stage 2 (caller thread): batched encoding ---
+def embed_collection(coll, model, select=None):
+    total = coll.estimated_document_count()
+    cursor = coll.find({}, STATE_PROJECTION)
+    print(f"Scanning {total} artifacts for new or changed text...")
+
+    docs_q = queue.Queue(maxsize=QUEUE_DEPTH)
+    ops_q = queue.Queue(maxsize=QUEUE_DEPTH)
+    errors = []
+    progress = tqdm(unit="doc")
+
+    def write(ops):
+        coll.bulk_write(ops, ordered=False)
+        progress.update(len(ops))
+
+    reader = threading.Thread(target=read_batches, args=(cursor, docs_q, errors, BATCH_SIZE, select), daemon=True)
+    writer = threading.Thread(target=write_batches, args=(ops_q, errors, write, WRITE_BATCH_SIZE), daemon=True)
+
+    started = time.perf_counter()
+    reader.start()
+    writer.start()
+    try:
+        while True:
+            batch = docs_q.get()
+            if batch is DONE or errors:
+                break
+            vectors = model.encode([artifact_text(d) for d in batch], batch_size=BATCH_SIZE)
+            now = datetime.utcnow()
+            ops_q.put([
+                UpdateOne({"_id": d["_id"]}, {"$set": {**embedding_fields(d, MODEL_NAME, v), "embedded_at": now}})
+                for d, v in zip(batch, vectors)
+            ])
+    finally:
+        ops_q.put(DONE)
+        writer.join()
+        progress.close()
+    if errors:
+        raise errors[0]
+
+    elapsed = time.perf_counter() - started
+    rate = progress.n / elapsed if elapsed else 0.0
+    print(f"Embedded {progress.n} artifacts in {elapsed:.1f}s ({rate:.1f} docs/sec).")
+    return progress.n
+
+def main():
+    # --- Load Model ---
+    model = SentenceTransformer(MODEL_NAME)
+
+    # --- Connect to MongoDB ---
+    client = MongoClient(MONGO_URI)
+    db = client[DB_NAME]
+    coll = db[COLLECTION]
+
+    # --- Embed all docs (that need embedding, if desired) ---
+    select = (lambda doc: needs_embedding(doc, MODEL_NAME)) if SKIP_IF_PRESENT else None
+    if embed_collection(coll, model, select):
+        bump_collection_version(db, COLLECTION)
+
+    print("Batch embedding complete. MongoDB search/text index remains unchanged.")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,17 @@
+import argparse
+import hashlib
 import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from bson import json_util
 from tqdm import tqdm
-from pymongo import MongoClient
-from vertexai.preview.language_models import TextEmbeddingModel
+from pymongo import MongoClient, UpdateOne
+from collection_version import bump_collection_version
+from embedding_state import STATE_PROJECTION, artifact_text, embedding_fields, needs_embedding
 
 # --- MongoDB from env vars ---
 MONGO_URI = os.environ.get("MONGO_URI")
@@ -9,47 +19,201 @@ DB_NAME = os.environ.get("MONGO_DB_NAME")
 COLLECTION = os.environ.get("MONGO_COLLECTION")
 
 # --- CONFIG ---
-EMBED_MODEL = "text-embedding-005"   
+EMBED_MODEL = "text-embedding-005"
+EMBED_DIM = 768
+FAKE_EMBED_MODEL = f"fake-sha256-{EMBED_DIM}"  # Stored on fake vectors so real runs replace them
 BATCH_SIZE = 100
 SKIP_IF_PRESENT = True
+EMBEDDER = os.environ.get("EMBEDDER", "vertex")                    # "vertex" or "fake" (offline)
+CONCURRENCY = int(os.environ.get("EMBED_CONCURRENCY", 4))          # Batches in flight
+RATE_PER_SEC = float(os.environ.get("EMBED_RATE_PER_SEC", 5))      # Embedding requests per second
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 1.0
+CHECKPOINT_PATH = os.environ.get(
+    "EMBED_CHECKPOINT_PATH",
+    os.path.join(os.path.dirname(__file__), ".batch_embed_vertex.checkpoint.json"),
+)
 
-def vertex_embed(texts):
-    model = TextEmbeddingModel.from_pretrained(EMBED_MODEL)
-    results = model.get_embeddings(texts)
-    # Each result has .values attribute (a list of floats)
-    return [r.values for r in results]
-
-# --- Connect to MongoDB ---
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-coll = db[COLLECTION]
-
-query = {} if not SKIP_IF_PRESENT else {"embedding": {"$exists": False}}
-total = coll.count_documents(query)
-cursor = coll.find(query)
-
-batch = []
-docs = []
-for doc in tqdm(cursor, total=total):
-    text = " ".join([
-        doc.get("title", ""),
-        doc.get("description", ""),
-        doc.get("region", "")
-    ])
-    batch.append(text)
-    docs.append(doc)
-
-    if len(batch) == BATCH_SIZE:
-        embeddings = vertex_embed(batch)
-        for d, emb in zip(docs, embeddings):
-            coll.update_one({"_id": d["_id"]}, {"$set": {"embedding": emb}})
-        batch = []
-        docs = []
-
-# Do remaining docs
-if batch:
-    embeddings = vertex_embed(batch)
-    for d, emb in zip(docs, embeddings):
-        coll.update_one({"_id": d["_id"]}, {"$set": {"embedding": emb}})
-
-print("Batch embedding complete using Vertex AI.")
\ No newline at end of file
+# --- Embedders ---
+class VertexEmbedder:
+    def __init__(self, model_name=EMBED_MODEL):
+        from vertexai.preview.language_models import TextEmbeddingModel
+        self.model_name = model_name
+        self.model = TextEmbeddingModel.from_pretrained(model_name)
+
+    def embed(self, texts):
+        results = self.model.get_embeddings(texts)
+        # Each result has .values attribute (a list of floats)
+        return [r.values for r in results]
+
+class FakeEmbedder:
+    # Deterministic unit vectors derived from the text, for offline runs and tests
+    def __init__(self, dim=EMBED_DIM):
+        self.dim = dim
+        self.model_name = FAKE_EMBED_MODEL
+
+    def embed(self, texts):
+        vectors = []
+        for text in texts:
+            rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+            vec = [rng.gauss(0.0, 1.0) for _ in range(self.dim)]
+            norm = sum(v * v for v in vec) ** 0.5 or 1.0
+            vectors.append([v / norm for v in vec])
+        return vectors
+
+def make_embedder(kind=EMBEDDER):
+    if kind == "fake":
+        return FakeEmbedder()
+    if kind == "vertex":
+        return VertexEmbedder()
+    raise ValueError(f"Unknown EMBEDDER '{kind}' (expected 'vertex' or 'fake')")
+
+STAND_IN_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+def is_stand_in(uri):
+    # True only for plain mongodb:// URIs whose hosts are all on this machine
+    if not uri or not uri.startswith("mongodb://"):
+        return False
+    hosts = uri[len("mongodb://"):].split("/", 1)[0].split("?", 1)[0].rsplit("@", 1)[-1]
+    for host in hosts.split(","):
+        name = host[1:host.index("]")] if host.startswith("[") else host.rsplit(":", 1)[0]
+        if name not in STAND_IN_HOSTS:
+            return False
+    return True
+
+# --- Rate limiting and retries ---
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = (1 - self.tokens) / self.rate
+            time.sleep(wait_for)
+
+def embed_with_retry(embedder, bucket, texts):
+    for attempt in range(MAX_RETRIES):
+        bucket.acquire()
+        try:
+            return embedder.embed(texts)
+        except Exception as e:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            delay = BACKOFF_SECONDS * (2 ** attempt) * (1 + random.random())
+            print(f"Embedding batch failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+# --- Checkpointing ---
+def load_checkpoint(path, model_name):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        state = json_util.loads(f.read())
+    if state.get("model") != model_name:
+        return None
+    return state.get("last_id")
+
+def save_checkpoint(path, model_name, last_id):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(json_util.dumps({"model": model_name, "last_id": last_id}))
+    os.replace(tmp, path)
+
+def iter_batches(cursor, select=None):
+    batch = []
+    for doc in cursor:
+        if select is not None and not select(doc):
+            continue
+        batch.append(doc)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# --- Job runner ---
+def run_job(coll, embedder, select=None, checkpoint_path=CHECKPOINT_PATH):
+    query = {}
+    model_name = embedder.model_name
+    last_id = load_checkpoint(checkpoint_path, model_name)
+    if last_id is not None:
+        print(f"Resuming after _id {last_id}")
+        query = {"_id": {"$gt": last_id}}
+    cursor = coll.find(query, STATE_PROJECTION).sort("_id", 1)
+
+    bucket = TokenBucket(RATE_PER_SEC)
+    progress = tqdm(unit="doc")
+    inflight = {}      # future -> (sequence number, batch)
+    submitted = []     # sequence numbers not yet covered by the checkpoint, in order
+    written = {}       # sequence number -> last _id of a written batch
+
+    def write(batch, embeddings):
+        now = datetime.utcnow()
+        coll.bulk_write([
+            UpdateOne({"_id": d["_id"]}, {"$set": {**embedding_fields(d, model_name, emb), "embedded_at": now}})
+            for d, emb in zip(batch, embeddings)
+        ], ordered=False)
+        progress.update(len(batch))
+
+    def drain(return_when):
+        done, _ = wait(list(inflight), return_when=return_when)
+        for fut in done:
+            seq, batch = inflight.pop(fut)
+            write(batch, fut.result())
+            written[seq] = batch[-1]["_id"]
+        # The checkpoint only advances over a fully written prefix of batches
+        while submitted and submitted[0] in written:
+            save_checkpoint(checkpoint_path, model_name, written.pop(submitted.pop(0)))
+
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        for seq, batch in enumerate(iter_batches(cursor, select)):
+            if len(inflight) >= CONCURRENCY:
+                drain(FIRST_COMPLETED)
+            texts = [artifact_text(d) for d in batch]
+            inflight[pool.submit(embed_with_retry, embedder, bucket, texts)] = (seq, batch)
+            submitted.append(seq)
+        if inflight:
+            drain(ALL_COMPLETED)
+    progress.close()
+
+    # A completed run starts from scratch next time
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return progress.n
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed artifacts with Vertex AI (or an offline fake).")
+    parser.add_argument("--reset", action="store_true", help="Ignore any saved checkpoint and start over")
+    args = parser.parse_args()
+    if args.reset and os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
+    if EMBEDDER == "fake" and not is_stand_in(MONGO_URI):
+        print("Error: EMBEDDER=fake only runs against a local stand-in database (MONGO_URI on localhost).")
+        sys.exit(1)
+
+    # --- Connect to MongoDB ---
+    client = MongoClient(MONGO_URI)
+    db = client[DB_NAME]
+    coll = db[COLLECTION]
+
+    # Only docs whose text hash or model changed, unless SKIP_IF_PRESENT is off
+    embedder = make_embedder()
+    select = (lambda doc: needs_embedding(doc, embedder.model_name)) if SKIP_IF_PRESENT else None
+    count = run_job(coll, embedder, select)
+    if count:
+        bump_collection_version(db, COLLECTION)
+    print(f"Batch embedding complete using {EMBEDDER} embedder ({count} artifacts).")
+
+if __name__ == "__main__":
+    main()
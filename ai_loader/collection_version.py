@@ -0,0 +1,19 @@
+# ai_loader/collection_version.py
+#
+# The API caches search responses per collection version; bump it after any
+# load or re-embed so cached results from before the change are not served.
+
+import os
+from datetime import datetime
+
+META_COLLECTION = os.environ.get("MONGO_META_COLLECTION", "heritage_lens_meta")
+
+def bump_collection_version(db, collection_name):
+    doc = db[META_COLLECTION].find_one_and_update(
+        {"_id": f"version:{collection_name}"},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True,
+        return_document=True,
+    )
+    print(f"Collection version for '{collection_name}' is now {doc['version']}.")
+    return doc["version"]
@@ -0,0 +1,44 @@
+# ai_loader/embedding_state.py
+#
+# Tracks what each stored embedding was computed from, so the embedders only
+# re-embed documents whose text or model changed.
+
+import hashlib
+import repo_path  # noqa: F401 (makes app.services importable)
+from app.services.vectors import EMBEDDING_FORMAT, encode_vector
+
+# Fields needed to decide whether a document is stale (the embedding itself is not fetched)
+STATE_PROJECTION = {
+    "title": 1,
+    "description": 1,
+    "region": 1,
+    "embedding_hash": 1,
+    "embedding_model": 1,
+    "embedding_dim": 1,
+}
+
+def artifact_text(doc):
+    # The exact text fed to the embedder
+    return " ".join([
+        doc.get("title", "") or "",
+        doc.get("description", "") or "",
+        doc.get("region", "") or ""
+    ])
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def needs_embedding(doc, model_name):
+    return (
+        doc.get("embedding_model") != model_name
+        or doc.get("embedding_hash") != content_hash(artifact_text(doc))
+    )
+
+def embedding_fields(doc, model_name, vector, fmt=EMBEDDING_FORMAT):
+    return {
+        "embedding": encode_vector(vector, fmt),
+        "embedding_hash": content_hash(artifact_text(doc)),
+        "embedding_model": model_name,
+        "embedding_dim": len(vector),
+        "embedding_format": fmt,
+    }
@@ -0,0 +1,166 @@
+# ai_loader/ingest_and_embed.py
+#
+# Loads a CSV/JSON file from ../data and writes each new artifact together with
+# its embedding, in a single upsert. It replaces running load_artifacts_to_mongo.py
+# and then a batch embedder. Parsing, embedding and writing run as overlapping
+# stages connected by bounded queues.
+#
+#   python ai_loader/ingest_and_embed.py artifacts.csv --embedder local
+#   python ai_loader/ingest_and_embed.py artifacts.csv --embedder fake --dry-run
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from pymongo import MongoClient, UpdateOne
+import repo_path  # noqa: F401 (makes app.services importable)
+from app.services.local_embedder import LocalEmbedder
+from batch_embed_vertex import RATE_PER_SEC, TokenBucket, embed_with_retry, is_stand_in, make_embedder
+from collection_version import bump_collection_version
+from embedding_state import STATE_PROJECTION, artifact_text, embedding_fields, needs_embedding
+from load_artifacts_to_mongo import DATA_DIR, archive, ensure_indexes, flush, iter_artifacts, iter_rows, report
+from pipeline import DONE, QUEUE_DEPTH, read_batches, write_batches
+
+# --- MongoDB from env vars ---
+MONGO_URI = os.environ.get("MONGO_URI")
+DB_NAME = os.environ.get("MONGO_DB_NAME")
+COLLECTION = os.environ.get("MONGO_COLLECTION")
+DRY_RUN_MONGO_URI = os.environ.get("DRY_RUN_MONGO_URI")  # e.g. a local mongod; mongomock if unset
+
+# --- Config ---
+EMBED_BATCH_SIZE = 64     # Rows per embedding call
+WRITE_BATCH_SIZE = 500    # Operations per unordered bulk_write
+
+def load_embedder(kind):
+    # Returns (model id stored on the documents, embed function)
+    if kind == "local":
+        embedder = LocalEmbedder()  # Same micro-batched model the API uses for queries
+        return embedder.model_name, embedder.embed
+    embedder = make_embedder(kind)
+    if kind == "vertex":
+        bucket = TokenBucket(RATE_PER_SEC)
+        return embedder.model_name, lambda texts: embed_with_retry(embedder, bucket, texts)
+    return embedder.model_name, embedder.embed
+
+# --- Stage 2 (caller thread): look up existing docs, embed, build upserts ---
+def existing_docs(coll, batch):
+    keys = [{"title": a["title"], "region": a["region"]} for a in batch]
+    return {(d.get("title"), d.get("region")): d for d in coll.find({"$or": keys}, STATE_PROJECTION)}
+
+def build_ops(coll, batch, embed, model_name, stats, seen):
+    # seen: keys already handled this run, whose writes may still be queued
+    existing = existing_docs(coll, batch)
+    targets = []  # (artifact to insert or None, doc whose text is embedded)
+    for artifact in batch:
+        key = (artifact["title"], artifact["region"])
+        if key in seen:
+            stats["matched"] += 1  # Repeated key in the file; the first row wins, as with $setOnInsert
+            continue
+        seen.add(key)
+        doc = existing.get(key)
+        if doc is None:
+            targets.append((artifact, artifact))
+        elif needs_embedding(doc, model_name):
+            targets.append((None, doc))  # Stored text wins, so embed that
+        else:
+            stats["matched"] += 1
+    if not targets:
+        return []
+    vectors = embed([artifact_text(doc) for _, doc in targets])
+    stats["embedded"] += len(targets)
+    now = datetime.utcnow()
+    ops = []
+    for (artifact, doc), vector in zip(targets, vectors):
+        fields = {**embedding_fields(doc, model_name, vector), "embedded_at": now}
+        if artifact is None:
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": fields}))
+        else:
+            ops.append(UpdateOne(
+                {"title": artifact["title"], "region": artifact["region"]},
+                {"$setOnInsert": {**artifact, **fields}},
+                upsert=True
+            ))
+    return ops
+
+def ingest_and_embed(coll, rows, embed, model_name):
+    ensure_indexes(coll)
+    stats = {"read": 0, "upserted": 0, "matched": 0, "rejected": 0, "embedded": 0, "errors": []}
+    parsed_q = queue.Queue(maxsize=QUEUE_DEPTH)
+    ops_q = queue.Queue(maxsize=QUEUE_DEPTH)
+    errors = []
+    seen = set()
+    artifacts = iter_artifacts(rows, stats)
+    parser = threading.Thread(target=read_batches, args=(artifacts, parsed_q, errors, EMBED_BATCH_SIZE), daemon=True)
+    writer = threading.Thread(
+        target=write_batches, args=(ops_q, errors, lambda ops: flush(coll, ops, stats), WRITE_BATCH_SIZE), daemon=True
+    )
+
+    started = time.perf_counter()
+    parser.start()
+    writer.start()
+    try:
+        while True:
+            batch = parsed_q.get()
+            if batch is DONE or errors:
+                break
+            ops = build_ops(coll, batch, embed, model_name, stats, seen)
+            if ops:
+                ops_q.put(ops)
+    finally:
+        ops_q.put(DONE)
+        writer.join()
+    if errors:
+        raise errors[0]
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+def connect(dry_run):
+    if not dry_run:
+        return MongoClient(MONGO_URI)
+    if DRY_RUN_MONGO_URI:
+        return MongoClient(DRY_RUN_MONGO_URI)
+    try:
+        import mongomock
+    except ImportError:
+        sys.exit("Error: --dry-run needs DRY_RUN_MONGO_URI (e.g. mongodb://localhost:27017) or the mongomock package.")
+    return mongomock.MongoClient()
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a CSV/JSON artifact file from ../data and embed it in one pass.")
+    parser.add_argument("data_file_name")
+    parser.add_argument("--embedder", choices=["local", "vertex", "fake"], default="local")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Write to a local stand-in database instead of MONGO_URI; the file is not archived")
+    args = parser.parse_args()
+
+    data_path = os.path.join(DATA_DIR, args.data_file_name)
+    if not os.path.exists(data_path):
+        print(f"Error: Data file '{args.data_file_name}' does not exist in ../data/.")
+        sys.exit(1)
+    if os.path.splitext(data_path)[1].lower() not in (".json", ".csv"):
+        print("Error: Unsupported file type. Please supply a .csv or .json file.")
+        sys.exit(1)
+
+    if args.embedder == "fake" and not args.dry_run and not is_stand_in(MONGO_URI):
+        print("Error: --embedder fake needs --dry-run or a local stand-in MONGO_URI.")
+        sys.exit(1)
+    model_name, embed = load_embedder(args.embedder)
+    client = connect(args.dry_run)
+    db = client[DB_NAME or "heritage_lens"]
+    coll = db[COLLECTION or "artifacts"]
+
+    stats = ingest_and_embed(coll, iter_rows(data_path), embed, model_name)
+    report(stats)
+    print(f"Embedded {stats['embedded']} artifacts with {model_name} in the same pass.")
+    if args.dry_run:
+        print(f"Dry run: stand-in collection now holds {coll.count_documents({})} artifacts; nothing archived.")
+        return
+    if stats["embedded"]:
+        bump_collection_version(db, COLLECTION)
+    archive(args.data_file_name)
+
+if __name__ == "__main__":
+    main()
@@ -1,77 +1,203 @@
-import os, sys, csv, json, ast
-from pymongo import MongoClient
-
-# --- ARGUMENT CHECK ---
-if len(sys.argv) != 2:
-    print("Usage: python batch_embed_local.py <data_file_name>")
-    sys.exit(1)
-
-file_name = sys.argv[1]
-data_path = os.path.join(os.path.dirname(__file__), "../data", file_name)
-archive_path = os.path.join(os.path.dirname(__file__), "../archive", file_name)
-
-if not os.path.exists(data_path):
-    print(f"Error: Data file '{file_name}' does not exist in ../data/.")
-    sys.exit(1)
-    
+import argparse, csv, json, os, shutil, sys, time
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+from collection_version import bump_collection_version
+
 # --- MongoDB from env vars ---
 MONGO_URI = os.environ.get("MONGO_URI")
 DB_NAME = os.environ.get("MONGO_DB_NAME")
 COLLECTION = os.environ.get("MONGO_COLLECTION")
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-coll = db[COLLECTION]
-    
-ext = os.path.splitext(file_name)[1].lower()
-if ext == ".json":
-    # Load data
-    with open(data_path, "r") as f:
-        artifacts = json.load(f)
-        
-    # Optionally: Prevent duplicate insertion using unique field
-    for art in artifacts:
-        coll.update_one(
-            {"title": art["title"], "region": art.get("region", "")},  # Or use another unique field
-            {"$setOnInsert": art},
-            upsert=True
-        )
-
-    print(f"Inserted or updated {len(artifacts)} artifacts.")
-    
-elif ext == ".csv":
-    with open(data_path, newline='', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        reader.fieldnames = [h.strip().lower().replace('"', '') for h in reader.fieldnames]
-        count = 0
-        for row in reader:
-            row = {k.replace('"','').strip(): v.replace('"','').strip() for k, v in row.items()}
-            title = row.get("title") or row.get("\ufefftitle") or ""
-            artifact = {
-                "title": title,
-                "region": row.get("region", ""),
-                "period": row.get("period", ""),
-                "description": row.get("description", ""),
-                "image_url": row.get("image_url", ""),
-                "themes": [t.strip() for t in row.get("themes", "").split(",") if t.strip()],
-            }
-            coll.update_one(
-                {"title": artifact["title"], "region": artifact["region"]},
-                {"$setOnInsert": artifact},
-                upsert=True
-            )
-            count += 1
-
-    print(f"Upserted {count} records into MongoDB collection!") 
-
-else:
-    print("Error: Unsupported file type. Please supply a .csv or .json file.")   
-    
-# --- Move File to Archive (unless sample_artifacts.json) ---
-if file_name not in ("sample_artifacts.json", "sample_artifacts.csv"):
-    archive_dir = os.path.dirname(archive_path)
-    os.makedirs(archive_dir, exist_ok=True)
-    shutil.move(data_path, archive_path)
-    print(f"Moved {file_name} to archive.")    
-else:
-    print(f"Did not archive sample file: {file_name}")
\ No newline at end of file
+# --- Config ---
+BATCH_SIZE = 1000           # Upserts per unordered bulk_write
+READ_CHUNK = 64 * 1024      # Bytes read per step when streaming a JSON array
+STRING_FIELDS = ("title", "region", "period", "description", "image_url", "reference_link")
+UNIQUE_INDEX = [("title", 1), ("region", 1)]
+MAX_ERROR_MESSAGES = 10     # Rejected-row messages kept for the summary; the rest are only counted
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "../data")
+ARCHIVE_DIR = os.path.join(os.path.dirname(__file__), "../archive")
+
+# --- Streaming readers ---
+def iter_json_array(f, chunk_size=READ_CHUNK):
+    # Yields the elements of a top-level JSON array without loading the whole file
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    started = False
+    eof = False
+    while True:
+        # Skip whitespace and separators between elements
+        while pos < len(buf) and (buf[pos].isspace() or (started and buf[pos] == ",")):
+            pos += 1
+        if pos < len(buf):
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError("Expected a JSON array of artifacts")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield obj
+                pos = end
+                continue
+        if eof:
+            raise ValueError("Unexpected end of JSON file")
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + chunk
+        pos = 0
+
+def iter_csv_rows(f):
+    reader = csv.DictReader(f)
+    reader.fieldnames = [h.strip().lower().replace('"', '') for h in reader.fieldnames]
+    for row in reader:
+        yield {k.replace('"', '').strip(): (v or "").replace('"', '').strip() for k, v in row.items() if k}
+
+def iter_rows(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            yield from iter_json_array(f)
+    elif ext == ".csv":
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            yield from iter_csv_rows(f)
+    else:
+        raise ValueError("Unsupported file type. Please supply a .csv or .json file.")
+
+# --- Validation / normalization ---
+def normalize_artifact(row):
+    if not isinstance(row, dict):
+        raise ValueError("row is not an object")
+    artifact = dict(row)
+    for field in STRING_FIELDS:
+        value = artifact.get(field, "")
+        if value is None:
+            value = ""
+        if not isinstance(value, str):
+            raise ValueError(f"'{field}' must be a string")
+        artifact[field] = value.strip()
+    if not artifact.get("reference_link"):
+        artifact.pop("reference_link", None)
+    if not artifact["title"]:
+        raise ValueError("missing title")
+
+    themes = artifact.get("themes") or []
+    if isinstance(themes, str):
+        themes = themes.split(",")
+    if not isinstance(themes, list):
+        raise ValueError("'themes' must be a list or a comma-separated string")
+    artifact["themes"] = [str(t).strip() for t in themes if str(t).strip()]
+    return artifact
+
+def reject(stats, message):
+    # Counts every rejected row but keeps only the first few messages, so memory stays flat on bad files
+    stats["rejected"] += 1
+    if len(stats["errors"]) < MAX_ERROR_MESSAGES:
+        stats["errors"].append(message)
+
+def iter_artifacts(rows, stats):
+    # Normalized artifacts; counts every row read and records the ones rejected
+    for row in rows:
+        stats["read"] += 1
+        try:
+            yield normalize_artifact(row)
+        except ValueError as e:
+            reject(stats, f"row {stats['read']}: {e}")
+
+# --- Bulk upserts ---
+def ensure_indexes(coll):
+    # Backs the (title, region) upsert key so each upsert is an index lookup, not a scan
+    coll.create_index(UNIQUE_INDEX, unique=True, name="title_region_unique")
+
+def upsert_op(artifact):
+    return UpdateOne(
+        {"title": artifact["title"], "region": artifact["region"]},
+        {"$setOnInsert": artifact},
+        upsert=True
+    )
+
+def flush(coll, ops, stats):
+    try:
+        result = coll.bulk_write(ops, ordered=False)
+        stats["upserted"] += result.upserted_count
+        stats["matched"] += result.matched_count
+    except BulkWriteError as e:
+        details = e.details
+        stats["upserted"] += details.get("nUpserted", 0)
+        stats["matched"] += details.get("nMatched", 0)
+        for err in details.get("writeErrors", []):
+            # Two rows racing on the same new key surface as duplicate key errors
+            if err.get("code") == 11000:
+                stats["matched"] += 1
+            else:
+                reject(stats, err.get("errmsg", "write error"))
+
+def ingest(coll, rows, batch_size=BATCH_SIZE):
+    ensure_indexes(coll)
+    stats = {"read": 0, "upserted": 0, "matched": 0, "rejected": 0, "errors": []}
+    started = time.perf_counter()
+    ops = []
+    for artifact in iter_artifacts(rows, stats):
+        ops.append(upsert_op(artifact))
+        if len(ops) >= batch_size:
+            flush(coll, ops, stats)
+            ops = []
+    if ops:
+        flush(coll, ops, stats)
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+def report(stats):
+    rate = stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(
+        f"Read {stats['read']} rows in {stats['seconds']:.1f}s ({rate:.0f} rows/sec): "
+        f"{stats['upserted']} inserted, {stats['matched']} already present, {stats['rejected']} rejected."
+    )
+    for msg in stats["errors"]:
+        print(f"  rejected: {msg}")
+    if stats["rejected"] > len(stats["errors"]):
+        print(f"  ... and {stats['rejected'] - len(stats['errors'])} more")
+
+def archive(file_name):
+    # --- Move File to Archive (unless sample_artifacts.json) ---
+    if file_name not in ("sample_artifacts.json", "sample_artifacts.csv"):
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        shutil.move(os.path.join(DATA_DIR, file_name), os.path.join(ARCHIVE_DIR, file_name))
+        print(f"Moved {file_name} to archive.")
+    else:
+        print(f"Did not archive sample file: {file_name}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a CSV/JSON artifact file from ../data into MongoDB.")
+    parser.add_argument("data_file_name")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    data_path = os.path.join(DATA_DIR, args.data_file_name)
+    if not os.path.exists(data_path):
+        print(f"Error: Data file '{args.data_file_name}' does not exist in ../data/.")
+        sys.exit(1)
+    if os.path.splitext(data_path)[1].lower() not in (".json", ".csv"):
+        print("Error: Unsupported file type. Please supply a .csv or .json file.")
+        sys.exit(1)
+
+    client = MongoClient(MONGO_URI)
+    db = client[DB_NAME]
+    coll = db[COLLECTION]
+
+    stats = ingest(coll, iter_rows(data_path), args.batch_size)
+    report(stats)
+    if stats["upserted"]:
+        bump_collection_version(db, COLLECTION)
+    archive(args.data_file_name)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# ai_loader/migrate_vectors.py
+#
+# Converts list-encoded embeddings (arrays of BSON doubles) to packed BSON
+# vectors and reports collection size and recall before and after.
+
+import argparse
+import os
+import time
+import numpy as np
+from tqdm import tqdm
+from pymongo import MongoClient, UpdateOne
+from collection_version import bump_collection_version
+import repo_path  # noqa: F401 (makes app.services importable)
+from app.services.vectors import EMBEDDING_FORMAT, decode_vector, encode_vector
+
+# --- MongoDB from env vars ---
+MONGO_URI = os.environ.get("MONGO_URI")
+DB_NAME = os.environ.get("MONGO_DB_NAME")
+COLLECTION = os.environ.get("MONGO_COLLECTION")
+
+# --- Config ---
+WRITE_BATCH_SIZE = 500
+RECALL_DOCS = 20000     # Documents sampled for the recall estimate
+RECALL_QUERIES = 200    # Queries (taken from sampled embeddings) for the recall estimate
+RECALL_K = 10
+
+LEGACY_QUERY = {"embedding": {"$type": "array"}}
+
+def collection_size(db, name):
+    stats = db.command("collStats", name)
+    return {
+        "count": stats.get("count", 0),
+        "size": stats.get("size", 0),
+        "avgObjSize": stats.get("avgObjSize", 0),
+        "storageSize": stats.get("storageSize", 0),
+    }
+
+def top_k(matrix, queries, k):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.maximum(norms, 1e-12)
+    scores = queries @ matrix.T
+    return np.argpartition(-scores, k, axis=1)[:, :k]
+
+def estimate_recall(coll, fmt, k=RECALL_K):
+    # Exact top-k over the original floats vs. over the vectors decoded from `fmt`
+    sample = list(coll.aggregate([
+        {"$match": LEGACY_QUERY},
+        {"$sample": {"size": RECALL_DOCS}},
+        {"$project": {"embedding": 1}},
+    ]))
+    if len(sample) <= k:
+        return None
+    exact = np.stack([np.asarray(d["embedding"], dtype=np.float32) for d in sample])
+    packed = np.stack([decode_vector(encode_vector(v, fmt)) for v in exact])
+    rng = np.random.default_rng(0)
+    picks = rng.choice(len(exact), size=min(RECALL_QUERIES, len(exact)), replace=False)
+    queries = exact[picks] / np.maximum(np.linalg.norm(exact[picks], axis=1, keepdims=True), 1e-12)
+    truth = top_k(exact, queries, k)
+    approx = top_k(packed, queries, k)
+    hits = sum(len(set(t) & set(a)) for t, a in zip(truth, approx))
+    return hits / (len(picks) * k)
+
+def migrate(coll, fmt):
+    total = coll.count_documents(LEGACY_QUERY)
+    cursor = coll.find(LEGACY_QUERY, {"embedding": 1})
+    ops = []
+    migrated = 0
+    for doc in tqdm(cursor, total=total, unit="doc"):
+        ops.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": {"embedding": encode_vector(doc["embedding"], fmt), "embedding_format": fmt}}
+        ))
+        if len(ops) >= WRITE_BATCH_SIZE:
+            migrated += coll.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        migrated += coll.bulk_write(ops, ordered=False).modified_count
+    return migrated
+
+def print_size(label, size):
+    print(
+        f"{label}: {size['count']} docs, data {size['size'] / 2**20:.1f} MiB "
+        f"(avg {size['avgObjSize']:.0f} B/doc), storage {size['storageSize'] / 2**20:.1f} MiB"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert list embeddings to packed BSON vectors.")
+    parser.add_argument("--format", default=EMBEDDING_FORMAT, choices=["float32", "int8", "packed_bit"])
+    parser.add_argument("--report-only", action="store_true", help="Measure size and recall without writing")
+    args = parser.parse_args()
+
+    client = MongoClient(MONGO_URI)
+    db = client[DB_NAME]
+    coll = db[COLLECTION]
+
+    before = collection_size(db, COLLECTION)
+    print_size("Before", before)
+    recall = estimate_recall(coll, args.format)
+    if recall is not None:
+        print(f"Estimated recall@{RECALL_K} of exact search over {args.format} vectors: {recall:.3f}")
+
+    if args.report_only:
+        return
+
+    started = time.perf_counter()
+    migrated = migrate(coll, args.format)
+    print(f"Converted {migrated} embeddings to {args.format} in {time.perf_counter() - started:.1f}s.")
+    if migrated:
+        bump_collection_version(db, COLLECTION)
+
+    after = collection_size(db, COLLECTION)
+    print_size("After", after)
+    if before["size"]:
+        print(f"Data size change: {100.0 * (after['size'] - before['size']) / before['size']:+.1f}% "
+              "(storageSize shrinks after the next compact)")
+
+if __name__ == "__main__":
+    main()
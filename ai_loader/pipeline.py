@@ -0,0 +1,51 @@
+# ai_loader/pipeline.py
+#
+# Reader and writer stages shared by the loaders that overlap reading,
+# embedding and writing. The caller's thread embeds between two bounded queues:
+#
+#   reader thread -> in_q -> caller (embed, build UpdateOnes) -> out_q -> writer thread
+
+DONE = object()   # End-of-stream marker put on a queue by the stage feeding it
+QUEUE_DEPTH = 8   # Batches buffered between pipeline stages
+
+# --- Stage 1: any iterable (cursor, parsed rows) -> batches ---
+def read_batches(items, out_q, errors, batch_size, select=None):
+    try:
+        batch = []
+        for item in items:
+            if select is not None and not select(item):
+                continue
+            batch.append(item)
+            if len(batch) == batch_size:
+                out_q.put(batch)
+                batch = []
+        if batch:
+            out_q.put(batch)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        out_q.put(DONE)
+
+# --- Stage 3: lists of operations -> write(ops), batch_size operations at a time ---
+def write_batches(in_q, errors, write, batch_size):
+    pending = []
+    failed = False
+    while True:
+        item = in_q.get()
+        if item is DONE:
+            break
+        if failed:
+            continue  # Keep draining so upstream stages never block on a full queue
+        pending.extend(item)
+        try:
+            if len(pending) >= batch_size:
+                write(pending)
+                pending = []
+        except Exception as e:
+            errors.append(e)
+            failed = True
+    if pending and not failed:
+        try:
+            write(pending)
+        except Exception as e:
+            errors.append(e)
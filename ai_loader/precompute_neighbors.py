@@ -0,0 +1,186 @@
+# ai_loader/precompute_neighbors.py
+#
+# Stores the top-N most similar artifacts (cosine over the stored embeddings) on
+# every document as "neighbors", so /api/explorer/artifacts/{id}/similar is one
+# indexed lookup. Similarity is exact and blocked: blocks of query rows are
+# scored against blocks of the matrix with NumPy on a few worker threads, each
+# keeping only its running top-N.
+#
+# By default only artifacts embedded since the last run get fresh lists, and
+# existing lists are updated where a new artifact beats their weakest entry.
+# Use --full to rebuild everything (e.g. after re-embedding changed texts).
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Every worker's matmul is multithreaded by BLAS too, so split the cores between
+# them (must be set before NumPy loads BLAS; an explicit env setting wins)
+CORES = os.cpu_count() or 1
+WORKERS = int(os.environ.get("NEIGHBOR_WORKERS", min(4, CORES)))
+for _var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, str(max(1, CORES // WORKERS)))
+
+import numpy as np
+from pymongo import MongoClient, UpdateOne
+from collection_version import META_COLLECTION
+import repo_path  # noqa: F401 (makes app.services importable)
+from app.services.vectors import decode_vector
+
+# --- MongoDB from env vars ---
+MONGO_URI = os.environ.get("MONGO_URI")
+DB_NAME = os.environ.get("MONGO_DB_NAME")
+COLLECTION = os.environ.get("MONGO_COLLECTION")
+
+# --- Config ---
+NEIGHBORS = 20            # Stored per artifact
+QUERY_BLOCK = 1024        # Query rows scored per task
+# Matrix rows per matmul. Per worker the peak is the float32 score block, the copy
+# argpartition works on and its int64 indices: QUERY_BLOCK x MATRIX_BLOCK x 16 bytes,
+# about 128 MiB at 1024 x 8192
+MATRIX_BLOCK = 8192
+WRITE_BATCH_SIZE = 1000
+CARD_FIELDS = ("title", "region", "period", "image_url")  # Copied into each entry so the API needs no second query
+
+def load_embeddings(coll, with_neighbors=False):
+    projection = {"embedding": 1, "embedded_at": 1, **{f: 1 for f in CARD_FIELDS}}
+    if with_neighbors:
+        projection["neighbors"] = 1
+    ids, vectors, embedded_at, cards, stored = [], [], [], [], []
+    for doc in coll.find({"embedding": {"$exists": True}}, projection):
+        ids.append(doc["_id"])
+        vectors.append(decode_vector(doc["embedding"]))
+        embedded_at.append(doc.get("embedded_at"))
+        cards.append({f: doc.get(f, "") for f in CARD_FIELDS})
+        stored.append(doc.get("neighbors"))
+    if not ids:
+        return ids, np.empty((0, 0), dtype=np.float32), embedded_at, cards, stored
+    matrix = np.stack(vectors).astype(np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    return ids, matrix, embedded_at, cards, stored
+
+def top_k_block(matrix, rows, k, columns=None):
+    # Best k columns (by cosine) for each query row, excluding the row itself; sorted by score.
+    # columns must be ascending (it is a subset of row numbers)
+    queries = matrix[rows]
+    columns = np.arange(len(matrix)) if columns is None else columns
+    k = min(k, len(columns))
+    best_scores = np.full((len(rows), k), -np.inf, dtype=np.float32)
+    best_cols = np.full((len(rows), k), -1, dtype=np.int64)
+    for start in range(0, len(columns), MATRIX_BLOCK):
+        cols = columns[start:start + MATRIX_BLOCK]
+        scores = queries @ matrix[cols].T
+        # Self-matches: where each query row falls in this block, if it does
+        at = np.minimum(np.searchsorted(cols, rows), len(cols) - 1)
+        self_rows = np.flatnonzero(cols[at] == rows)
+        scores[self_rows, at[self_rows]] = -np.inf
+        # Reduce the block to its own top k, then merge with the running best
+        block_k = min(k, len(cols))
+        keep = np.argpartition(scores, len(cols) - block_k, axis=1)[:, -block_k:]
+        all_scores = np.concatenate([best_scores, np.take_along_axis(scores, keep, axis=1)], axis=1)
+        all_cols = np.concatenate([best_cols, cols[keep]], axis=1)
+        del scores, keep
+        keep = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(all_scores, keep, axis=1)
+        best_cols = np.take_along_axis(all_cols, keep, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_cols, order, axis=1)
+
+def neighbors_for(matrix, rows, k, columns=None):
+    # Splits rows into blocks scored in parallel; NumPy releases the GIL inside the matmuls
+    blocks = [rows[i:i + QUERY_BLOCK] for i in range(0, len(rows), QUERY_BLOCK)]
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        for block, (scores, cols) in zip(blocks, pool.map(lambda b: top_k_block(matrix, b, k, columns), blocks)):
+            yield block, scores, cols
+
+def entries(ids, cards, scores, cols):
+    return [
+        {"_id": ids[c], "score": round(float(s), 6), **cards[c]}
+        for s, c in zip(scores, cols)
+        if c >= 0 and np.isfinite(s)
+    ]
+
+def merge_entries(current, candidates, k):
+    # Keeps the best k of a stored list plus new candidates, one entry per artifact
+    best = {}
+    for entry in (current or []) + candidates:
+        if entry["_id"] not in best or entry["score"] > best[entry["_id"]]["score"]:
+            best[entry["_id"]] = entry
+    return sorted(best.values(), key=lambda e: e["score"], reverse=True)[:k]
+
+def write(coll, ops):
+    if ops:
+        coll.bulk_write(ops, ordered=False)
+    return len(ops)
+
+def precompute(coll, k=NEIGHBORS, since=None, full=False):
+    ids, matrix, embedded_at, cards, stored = load_embeddings(coll, with_neighbors=not full)
+    if len(ids) < 2:
+        print("Need at least two embedded artifacts.")
+        return 0
+    print(f"Loaded {len(ids)} embeddings ({matrix.shape[1]}-d); {WORKERS} workers.")
+    if full or since is None:
+        fresh = np.arange(len(ids))
+    else:
+        # Newly embedded, or never given a list
+        fresh = np.array([i for i, (t, n) in enumerate(zip(embedded_at, stored)) if n is None or (t is not None and t >= since)], dtype=np.int64)
+    if not len(fresh):
+        print("No newly embedded artifacts; neighbour lists are up to date.")
+        return 0
+
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    written = 0
+    ops = []
+    for block, scores, cols in neighbors_for(matrix, fresh, k):
+        for row, row_scores, row_cols in zip(block, scores, cols):
+            ops.append(UpdateOne({"_id": ids[row]}, {"$set": {"neighbors": entries(ids, cards, row_scores, row_cols), "neighbors_at": now}}))
+        if len(ops) >= WRITE_BATCH_SIZE:
+            written += write(coll, ops)
+            ops = []
+
+    if len(fresh) < len(ids):
+        # Existing lists: only the new artifacts can have displaced an entry
+        fresh_set = set(fresh.tolist())
+        others = np.array([i for i in range(len(ids)) if i not in fresh_set], dtype=np.int64)
+        for block, scores, cols in neighbors_for(matrix, others, k, columns=fresh):
+            for row, row_scores, row_cols in zip(block, scores, cols):
+                current = stored[row] or []
+                floor = current[-1]["score"] if len(current) >= k else -np.inf
+                candidates = [e for e in entries(ids, cards, row_scores, row_cols) if e["score"] > floor]
+                if candidates:
+                    ops.append(UpdateOne({"_id": ids[row]}, {"$set": {"neighbors": merge_entries(current, candidates, k), "neighbors_at": now}}))
+            if len(ops) >= WRITE_BATCH_SIZE:
+                written += write(coll, ops)
+                ops = []
+    written += write(coll, ops)
+    elapsed = time.perf_counter() - started
+    print(f"Updated neighbour lists on {written} artifacts in {elapsed:.1f}s ({len(fresh)} recomputed in full).")
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute top-N similar artifacts for /artifacts/{id}/similar.")
+    parser.add_argument("--neighbors", type=int, default=NEIGHBORS)
+    parser.add_argument("--full", action="store_true", help="Recompute every list instead of only new artifacts")
+    args = parser.parse_args()
+
+    client = MongoClient(MONGO_URI)
+    db = client[DB_NAME]
+    coll = db[COLLECTION]
+    state_id = f"neighbors:{COLLECTION}"
+    state = db[META_COLLECTION].find_one({"_id": state_id}) or {}
+    full = args.full or state.get("neighbors") != args.neighbors
+
+    started_at = datetime.utcnow()
+    precompute(coll, args.neighbors, since=state.get("watermark"), full=full)
+    # Artifacts embedded while this ran are picked up next time
+    db[META_COLLECTION].update_one(
+        {"_id": state_id},
+        {"$set": {"watermark": started_at, "neighbors": args.neighbors}},
+        upsert=True,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+# ai_loader/repo_path.py
+#
+# Puts the repository root on sys.path so the loaders import the code they share
+# with the API (app/services) instead of keeping their own copies of it.
+
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,130 @@
+# ai_loader/tune_num_candidates.py
+#
+# Measures $vectorSearch recall and latency against exact brute-force top-k
+# over the stored embeddings, and stores the cheapest numCandidates per k that
+# meets the recall target. The API picks the policy up automatically; rerun
+# this after the collection grows.
+
+import argparse
+import os
+import time
+from datetime import datetime
+import numpy as np
+from pymongo import MongoClient
+from collection_version import META_COLLECTION
+import repo_path  # noqa: F401 (makes app.services importable)
+from app.services.vectors import decode_vector, encode_vector
+
+# --- MongoDB from env vars ---
+MONGO_URI = os.environ.get("MONGO_URI")
+DB_NAME = os.environ.get("MONGO_DB_NAME")
+COLLECTION = os.environ.get("MONGO_COLLECTION")
+
+# --- Config ---
+INDEX_NAME = "embedding_knn"
+K_VALUES = [5, 10, 20, 50, 100]
+CANDIDATE_RATIOS = [1, 2, 4, 8, 12, 16, 24, 32, 64]
+MAX_CANDIDATES = 10000
+QUERY_COUNT = 100
+TARGET_RECALL = 0.95
+EXACT_BLOCK = 8192  # Rows scored per block when computing exact top-k
+
+def load_embeddings(coll):
+    ids, vectors = [], []
+    for doc in coll.find({"embedding": {"$exists": True}}, {"embedding": 1}):
+        ids.append(doc["_id"])
+        vectors.append(decode_vector(doc["embedding"]))
+    matrix = np.stack(vectors).astype(np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    return ids, matrix
+
+def exact_top_k(matrix, queries, k):
+    # Blocked brute force: keep a running top-k per query across row blocks
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_rows = np.zeros((len(queries), k), dtype=np.int64)
+    for start in range(0, len(matrix), EXACT_BLOCK):
+        scores = queries @ matrix[start:start + EXACT_BLOCK].T
+        rows = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+        all_scores = np.concatenate([best_scores, scores], axis=1)
+        all_rows = np.concatenate([best_rows, rows], axis=1)
+        keep = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(all_scores, keep, axis=1)
+        best_rows = np.take_along_axis(all_rows, keep, axis=1)
+    return best_rows
+
+def ann_top_k(coll, query, k, num_candidates):
+    pipeline = [
+        {"$vectorSearch": {
+            "index": INDEX_NAME,
+            "queryVector": encode_vector(query),
+            "path": "embedding",
+            "numCandidates": num_candidates,
+            "limit": k,
+        }},
+        {"$project": {"_id": 1}},
+    ]
+    started = time.perf_counter()
+    found = [doc["_id"] for doc in coll.aggregate(pipeline)]
+    return found, (time.perf_counter() - started) * 1000.0
+
+def evaluate(coll, ids, queries, k, num_candidates, truth):
+    recalls, latencies = [], []
+    for q, true_rows in zip(queries, truth):
+        found, ms = ann_top_k(coll, q, k, num_candidates)
+        expected = {ids[r] for r in true_rows}
+        recalls.append(len(expected.intersection(found)) / k)
+        latencies.append(ms)
+    return float(np.mean(recalls)), float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+def tune(coll, ids, matrix, query_count=QUERY_COUNT, target=TARGET_RECALL):
+    rng = np.random.default_rng(0)
+    queries = matrix[rng.choice(len(matrix), size=min(query_count, len(matrix)), replace=False)]
+    policy, report = {}, []
+    for k in K_VALUES:
+        if k >= len(matrix):
+            break
+        truth = exact_top_k(matrix, queries, k)
+        for ratio in CANDIDATE_RATIOS:
+            num_candidates = min(k * ratio, MAX_CANDIDATES)
+            recall, p50, p95 = evaluate(coll, ids, queries, k, num_candidates, truth)
+            report.append((k, num_candidates, recall, p50, p95))
+            print(f"k={k:<4} numCandidates={num_candidates:<6} recall={recall:.3f} p50={p50:.1f}ms p95={p95:.1f}ms")
+            if recall >= target or num_candidates == MAX_CANDIDATES:
+                break
+        if recall < target:
+            print(f"Warning: k={k} only reached recall {recall:.3f} < {target}; storing the largest numCandidates tried ({num_candidates})")
+        # On a miss this is the largest value tried, so the API never silently keeps its old default
+        policy[str(k)] = num_candidates
+    return policy, report
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune $vectorSearch numCandidates per k.")
+    parser.add_argument("--queries", type=int, default=QUERY_COUNT, help="Stored embeddings sampled as queries")
+    parser.add_argument("--target-recall", type=float, default=TARGET_RECALL)
+    parser.add_argument("--dry-run", action="store_true", help="Print the policy without storing it")
+    args = parser.parse_args()
+
+    client = MongoClient(MONGO_URI)
+    db = client[DB_NAME]
+    coll = db[COLLECTION]
+
+    ids, matrix = load_embeddings(coll)
+    print(f"Loaded {len(ids)} embeddings ({matrix.shape[1]}-d) for exact search.")
+    policy, _ = tune(coll, ids, matrix, args.queries, args.target_recall)
+    print(f"Policy (k -> numCandidates) for recall >= {args.target_recall}: {policy}")
+
+    if not args.dry_run and policy:
+        db[META_COLLECTION].update_one(
+            {"_id": f"num_candidates:{COLLECTION}"},
+            {"$set": {
+                "policy": policy,
+                "target_recall": args.target_recall,
+                "doc_count": len(ids),
+                "tuned_at": datetime.utcnow(),
+            }},
+            upsert=True,
+        )
+        print("Stored policy; the API picks it up within NUM_CANDIDATES_POLICY_REFRESH seconds.")
+
+if __name__ == "__main__":
+    main()
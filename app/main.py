@@ -1,6 +1,63 @@
-from fastapi import FastAPI
-from app.routes.explorer import router as explorer_router
+import logging
+import time
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="Heritage Lens")
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.routes.explorer import router as explorer_router, warmup_steps
+from app.services import db
+from app.services.executor import executor
+from app.services.metrics import SERVER_TIMING, registry, request_seconds, requests_total, server_timing_header, start_request_timings
+from app.services.profiler import finish_profile, start_profile
+from app.services.warmup import readiness
 
-app.include_router(explorer_router, prefix="/api/explorer")
\ No newline at end of file
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm-up runs in the background; /readyz stays 503 until it has finished
+    readiness.start(warmup_steps())
+    yield
+    await readiness.stop()
+    executor.shutdown(wait=False, cancel_futures=True)
+    db.close()
+
+app = FastAPI(title="Heritage Lens", lifespan=lifespan)
+
+app.include_router(explorer_router, prefix="/api/explorer")
+
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    timings = start_request_timings()
+    sampler = start_profile()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - started
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        request_seconds.observe(elapsed, route=path, method=request.method, status=str(status))
+        requests_total.inc(route=path, method=request.method, status=str(status))
+        finish_profile(sampler, f"{request.method} {request.url.path}", elapsed * 1000.0)
+    if SERVER_TIMING:
+        # Streaming responses only report the stages finished before the headers went out
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed * 1000.0)
+    return response
+
+@app.get("/healthz")
+def healthz():
+    # Liveness: the process is up and serving requests
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    # Readiness: Mongo reachable, embedding model loaded, caches primed
+    status = readiness.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,106 +1,608 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict
-from app.services.db import artifacts
-from app.services.vertexai import embed_query  # <--- Adjust the import path if needed
-import re
+from bson import ObjectId
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Dict, Optional
+from app.services.admission import AdmissionController, Overloaded
+from app.services.candidates import CandidatePolicy
+from app.services.deadline import reserve, set_deadline, start_deadline
+from app.services.db import COLLECTION, artifacts, meta, ping
+from app.services.executor import run_blocking
+from app.services.export import EXPORT_CHUNK_ROWS, EXPORT_FIELDS, EXPORT_FORMATS, encode_next_chunk, make_encoder
+from app.services.facets import FacetCounts
+from app.services import lexical_index
+from app.services.metrics import errors_total, partial_total, registry, timed
+from app.services.rerank import rerank
+from app.services.search_cache import CollectionVersion, SearchCache, search_cache_key
+from app.services.vector_index import get_vector_index, maybe_refresh
+from app.services.vectors import decode_vector, encode_vector
+from app.services.embeddings import embed_queries, embed_query, query_cache, warm_up
+from pymongo.errors import PyMongoError
+import asyncio
+import base64
+import json
+import logging
+import os
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-class QueryRequest(BaseModel):
+# "atlas" uses the embedding_knn $vectorSearch index; "local" scores in process
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "atlas")
+# "atlas" uses the $search index; "bm25" scores with the in-process lexical index
+TEXT_BACKEND = os.environ.get("TEXT_BACKEND", "atlas")
+
+search_cache = SearchCache()
+collection_version = CollectionVersion(meta, COLLECTION)
+facet_counts = FacetCounts(artifacts, meta, COLLECTION)
+candidate_policy = CandidatePolicy(meta, COLLECTION)
+admission = AdmissionController()
+
+MAX_PAGE_SIZE = 100
+MAX_BATCH_QUERIES = 100
+MAX_SIMILAR = 50
+BATCH_FANOUT = int(os.environ.get("BATCH_SEARCH_FANOUT", 8))  # Queries searched at once per batch
+
+def cache_metrics():
+    # Cache counters live on the caches; /metrics reads them at scrape time
+    for cache_name, stats in (("search", search_cache.stats()), ("embedding", query_cache.stats())):
+        for stat, value in stats.items():
+            if stat == "size":
+                yield "heritage_cache_entries", "gauge", "Entries currently cached.", {"cache": cache_name}, value
+            else:
+                yield "heritage_cache_events_total", "counter", "Cache hits, misses and evictions.", {"cache": cache_name, "event": stat}, value
+
+registry.add_collector(cache_metrics)
+
+def admission_metrics():
+    stats = admission.stats()
+    yield "heritage_search_in_flight", "gauge", "Search requests currently admitted.", {}, stats["in_flight"]
+    yield "heritage_search_queued", "gauge", "Search requests waiting for a slot.", {}, stats["queued"]
+    for outcome in ("admitted", "shed"):
+        yield "heritage_search_admission_total", "counter", "Search requests admitted or shed with 503.", {"outcome": outcome}, stats[outcome]
+
+registry.add_collector(admission_metrics)
+
+def warmup_steps():
+    # Run by the lifespan hook before the worker reports ready
+    steps = [
+        ("mongo", ping),
+        ("collection_version", collection_version.fetch),
+        ("num_candidates", candidate_policy.load),
+        ("embedding", warm_up),
+    ]
+    if VECTOR_BACKEND == "local":
+        steps.append(("vector_index", lambda: get_vector_index(artifacts)))
+    if TEXT_BACKEND == "bm25":
+        steps.append(("lexical_index", lambda: lexical_index.get_lexical_index(artifacts)))
+    return steps
+
+class SearchFilters(BaseModel):
+    # Pushed down into both legs; themes match if the artifact has any of them
+    region: Optional[str] = None
+    period: Optional[str] = None
+    themes: Optional[List[str]] = None
+
+    def active(self) -> dict:
+        filters = {}
+        if self.region:
+            filters["region"] = self.region
+        if self.period:
+            filters["period"] = self.period
+        if self.themes:
+            filters["themes"] = sorted(set(self.themes))
+        return filters
+
+class QueryRequest(SearchFilters):
     query: str
     k: int = 20  # default number of results
+    page_size: Optional[int] = Field(None, ge=1, le=MAX_PAGE_SIZE)  # set to page through the k results server-side
+    cursor: Optional[str] = None     # next_cursor from the previous page
 
-def combined_score(doc, query):
-    # Prefer higher vector score and title match
-    vector_score = doc.get("vector_score", 0)
-    text_score = doc.get("text_score", 0)
-    title = doc.get("title", "").lower()
-    query_keywords = [kw.lower() for kw in re.findall(r'\w+', query)]
-    title_match_bonus = sum(1 for kw in query_keywords if kw in title) * 0.2
-    return vector_score + text_score + title_match_bonus
+class BatchQueryRequest(SearchFilters):
+    queries: List[str]
+    k: int = 20
 
-@router.post("/search")
-async def search_heritage_data(request: QueryRequest):
-    try:
-        embedding = embed_query(request.query)
-        k = getattr(request, "k", 20)
-
-        # --- 1. Vector search ---
-        vector_pipeline = [
-            {
-                "$vectorSearch": {
-                    "index": "embedding_knn",
-                    "queryVector": embedding,
-                    "path": "embedding",
-                    "numCandidates": 100,
-                    "k": k,
-                    "limit": k
-                }
-            },
-            {
-                "$project": {
-                    "title": 1,
-                    "description": 1,
-                    "region": 1,
-                    "image_url": 1,
-                    "themes": 1,
-                    "period": 1,
-                    "reference_link": 1,
-                    "vector_score": { "$meta": "vectorSearchScore" }
-                }
+RESULT_FIELDS = {
+    "title": 1,
+    "description": 1,
+    "region": 1,
+    "image_url": 1,
+    "themes": 1,
+    "period": 1,
+    "reference_link": 1,
+}
+
+# Paged search ranks on ids + titles only, then loads card fields for the page being returned
+RANK_FIELDS = {"title": 1}
+LIST_FIELDS = {
+    "title": 1,
+    "region": 1,
+    "period": 1,
+    "image_url": 1,
+}
+
+# --- Filter pushdown (region/period/themes must be filter fields in embedding_knn
+#     and token fields in the $search index) ---
+def match_filter(filters: Optional[dict]) -> dict:
+    # MQL form, used by $vectorSearch.filter and by find()
+    clauses = []
+    for field in ("region", "period"):
+        if filters and filters.get(field):
+            clauses.append({field: {"$eq": filters[field]}})
+    if filters and filters.get("themes"):
+        clauses.append({"themes": {"$in": filters["themes"]}})
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def search_filter_clauses(filters: Optional[dict]) -> List[dict]:
+    # Atlas Search form, used as compound.filter (does not affect searchScore)
+    clauses = []
+    for field in ("region", "period"):
+        if filters and filters.get(field):
+            clauses.append({"equals": {"path": field, "value": filters[field]}})
+    if filters and filters.get("themes"):
+        clauses.append({"in": {"path": "themes", "value": filters["themes"]}})
+    return clauses
+
+def build_vector_pipeline(embedding, k: int, fields: dict = RESULT_FIELDS, filters: Optional[dict] = None,
+                          num_candidates: int = 100) -> List[dict]:
+    vector_search = {
+        "index": "embedding_knn",
+        "queryVector": encode_vector(embedding),
+        "path": "embedding",
+        "numCandidates": num_candidates,
+        "k": k,
+        "limit": k
+    }
+    if filters:
+        vector_search["filter"] = match_filter(filters)
+    return [
+        { "$vectorSearch": vector_search },
+        {
+            "$project": {
+                **fields,
+                "vector_score": { "$meta": "vectorSearchScore" }
             }
-        ]
-        vector_results = list(artifacts.aggregate(vector_pipeline))
-
-        # --- 2. Text search ---
-        text_pipeline = [
-            {
-                "$search": {
-                    "text": {
-                        "query": request.query,
-                        "path": ["title", "description", "region"]
-                    }
-                }
-            },
-            {
-                "$project": {
-                    "title": 1,
-                    "description": 1,
-                    "region": 1,
-                    "image_url": 1,
-                    "themes": 1,
-                    "period": 1,
-                    "reference_link": 1,
-                    "text_score": { "$meta": "searchScore" }
-                }
-            },
-            { "$limit": k }
-        ]
-        text_results = list(artifacts.aggregate(text_pipeline))
+        }
+    ]
 
-        # --- 3. Combine and deduplicate (by _id) ---
-        docs: Dict[str, dict] = {}
-        for doc in vector_results:
-            doc["_id"] = str(doc["_id"])
+def build_text_pipeline(query: str, k: int, fields: dict = RESULT_FIELDS, filters: Optional[dict] = None) -> List[dict]:
+    text = {
+        "query": query,
+        "path": ["title", "description", "region"]
+    }
+    search = {"text": text}
+    if filters:
+        search = {"compound": {"must": [search], "filter": search_filter_clauses(filters)}}
+    return [
+        { "$search": search },
+        {
+            "$project": {
+                **fields,
+                "text_score": { "$meta": "searchScore" }
+            }
+        },
+        { "$limit": k }
+    ]
+
+def aggregate(pipeline: List[dict]) -> List[dict]:
+    return list(artifacts.aggregate(pipeline))
+
+def atlas_vector_search(embedding, k: int, fields: dict = RESULT_FIELDS, filters: Optional[dict] = None) -> List[dict]:
+    # numCandidates follows the tuned per-k policy (see ai_loader/tune_num_candidates.py)
+    num_candidates = candidate_policy.num_candidates(k)
+    return aggregate(build_vector_pipeline(embedding, k, fields, filters, num_candidates))
+
+def local_vector_search(embedding, k: int, fields: dict = RESULT_FIELDS, filters: Optional[dict] = None) -> List[dict]:
+    maybe_refresh(artifacts)
+    # Scores only the rows passing the filter, so filtered queries still get k hits
+    hits = get_vector_index(artifacts).search(embedding, k, filters)
+    if not hits:
+        return []
+    found = {doc["_id"]: doc for doc in artifacts.find({"_id": {"$in": [i for i, _ in hits]}}, fields)}
+    results = []
+    for _id, score in hits:
+        doc = found.get(_id)
+        if doc is not None:
+            doc["vector_score"] = score
+            results.append(doc)
+    return results
+
+def local_text_search(query: str, k: int, fields: dict = RESULT_FIELDS, filters: Optional[dict] = None) -> List[dict]:
+    lexical_index.maybe_refresh(artifacts)
+    hits = lexical_index.get_lexical_index(artifacts).search(query, k, filters)
+    if not hits:
+        return []
+    found = {doc["_id"]: doc for doc in artifacts.find({"_id": {"$in": [i for i, _ in hits]}}, fields)}
+    results = []
+    for _id, score in hits:
+        doc = found.get(_id)
+        if doc is not None:
+            doc["text_score"] = score
+            results.append(doc)
+    return results
+
+async def vector_leg(query: str, k: int, fields: dict = RESULT_FIELDS, embedding=None, filters: Optional[dict] = None) -> List[dict]:
+    if embedding is None:
+        with timed("embed"):
+            embedding = await run_blocking(embed_query, query)
+    with timed("vector"):
+        if VECTOR_BACKEND == "local":
+            return await run_blocking(local_vector_search, embedding, k, fields, filters)
+        return await run_blocking(atlas_vector_search, embedding, k, fields, filters)
+
+async def text_leg(query: str, k: int, fields: dict = RESULT_FIELDS, filters: Optional[dict] = None) -> List[dict]:
+    with timed("text"):
+        if TEXT_BACKEND == "bm25":
+            return await run_blocking(local_text_search, query, k, fields, filters)
+        return await run_blocking(aggregate, build_text_pipeline(query, k, fields, filters))
+
+def merge_results(vector_results: List[dict], text_results: List[dict]) -> Dict[str, dict]:
+    docs: Dict[str, dict] = {}
+    for doc in vector_results:
+        doc["_id"] = str(doc["_id"])
+        docs[doc["_id"]] = doc
+    for doc in text_results:
+        doc["_id"] = str(doc["_id"])
+        # Merge/keep best scores if present in both
+        if doc["_id"] in docs:
+            docs[doc["_id"]]["text_score"] = doc.get("text_score", 0)
+        else:
+            doc["vector_score"] = 0  # ensure both scores exist
             docs[doc["_id"]] = doc
-        for doc in text_results:
-            doc["_id"] = str(doc["_id"])
-            # Merge/keep best scores if present in both
-            if doc["_id"] in docs:
-                docs[doc["_id"]]["text_score"] = doc.get("text_score", 0)
-            else:
-                doc["vector_score"] = 0  # ensure both scores exist
-                docs[doc["_id"]] = doc
+    return docs
+
+class SearchResults(list):
+    # Ranked hits; `missing` names a leg that failed or ran past the deadline
+    def __init__(self, hits=(), missing=()):
+        super().__init__(hits)
+        self.missing = list(missing)
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.missing)
+
+def is_timeout(e: BaseException) -> bool:
+    # Deadline expiry: ours, the server's maxTimeMS, or pymongo's timeout() budget running out
+    # while selecting a server or waiting for a pooled connection. Other failures are real errors
+    return isinstance(e, asyncio.TimeoutError) or (isinstance(e, PyMongoError) and e.timeout)
+
+def combine(query: str, k: int, vector_results, text_results) -> SearchResults:
+    # Either leg may be an exception. A leg that timed out is dropped and the other leg
+    # answers; any other error fails the search so it maps to 500/503 as usual.
+    legs = {"vector": vector_results, "text": text_results}
+    for results in legs.values():
+        if isinstance(results, Exception) and not is_timeout(results):
+            raise results
+    missing = [leg for leg, results in legs.items() if isinstance(results, Exception)]
+    if len(missing) == 2:
+        raise vector_results
+    for leg in missing:
+        errors_total.inc(type=type(legs[leg]).__name__)
+        partial_total.inc(leg=leg)
+        logger.warning("Search %s leg dropped for query %r: %r", leg, query, legs[leg])
+        legs[leg] = []
+
+    # --- 3. Combine and deduplicate (by _id) ---
+    with timed("merge"):
+        docs = merge_results(legs["vector"], legs["text"])
+
+    # --- 4. Rerank by combined score ---
+    with timed("rerank"):
+        return SearchResults(rerank(docs.values(), query, k), missing)
+
+async def hybrid_search(query: str, k: int, fields: dict = RESULT_FIELDS, embedding=None, filters: Optional[dict] = None) -> SearchResults:
+    # --- 1 & 2. Vector (embed + $vectorSearch) and text ($search) legs run concurrently ---
+    with reserve():
+        vector_results, text_results = await asyncio.gather(
+            vector_leg(query, k, fields, embedding, filters),
+            text_leg(query, k, fields, filters),
+            return_exceptions=True,
+        )
+    return combine(query, k, vector_results, text_results)
+
+def with_partial(response: dict, results) -> dict:
+    if getattr(results, "partial", False):
+        response.update(partial=True, missing=results.missing)
+    return response
+
+# --- Pagination ---
+def encode_cursor(state: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode()
+
+def decode_cursor(token: str) -> dict:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token.encode()))
+        filters = SearchFilters(**state.get("f", {})).active()
+        return {"q": str(state["q"]), "k": int(state["k"]), "o": int(state["o"]), "s": int(state["s"]), "f": filters}
+    except (ValueError, KeyError, TypeError, ValidationError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-        # --- 4. Rerank by combined score ---
-        combined_results = sorted(
-            docs.values(),
-            key=lambda d: combined_score(d, request.query),
-            reverse=True
-        )[:k]
+def to_object_id(artifact_id: str):
+    return ObjectId(artifact_id) if ObjectId.is_valid(artifact_id) else artifact_id
 
-        return {"results": combined_results}
+def load_fields(ids: List[str], fields: dict) -> Dict[str, dict]:
+    cursor = artifacts.find({"_id": {"$in": [to_object_id(i) for i in ids]}}, fields)
+    return {str(doc["_id"]): doc for doc in cursor}
 
+async def paged_search(request: QueryRequest, version: int) -> dict:
+    if request.cursor:
+        state = decode_cursor(request.cursor)
+    else:
+        state = {"q": request.query, "k": request.k, "o": 0, "s": request.page_size, "f": request.active()}
+    if not 0 < state["s"] <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+
+    key = search_cache_key(version, state["q"], state["k"], view="rank", **state["f"])
+    ranked = await search_cache.get_or_compute(
+        key, lambda: hybrid_search(state["q"], state["k"], RANK_FIELDS, filters=state["f"])
+    )
+    return await page_response(ranked, state, LIST_FIELDS)
+
+async def hydrate(hits: List[dict], fields: dict) -> List[dict]:
+    # Loads display fields for ranked hits, keeping rank order and scores
+    with timed("hydrate"):
+        found = await run_blocking(load_fields, [str(d["_id"]) for d in hits], fields)
+    results = []
+    for hit in hits:
+        doc = found.get(str(hit["_id"]))
+        if doc is not None:
+            results.append({**doc, "_id": str(hit["_id"]), "vector_score": hit.get("vector_score", 0), "text_score": hit.get("text_score", 0)})
+    return results
+
+async def page_response(ranked: List[dict], state: dict, fields: dict) -> dict:
+    start, end = state["o"], state["o"] + state["s"]
+    results = await hydrate(ranked[start:end], fields)
+    next_cursor = encode_cursor({**state, "o": end}) if end < len(ranked) else None
+    return with_partial({"results": results, "total": len(ranked), "next_cursor": next_cursor}, ranked)
+
+# --- Errors ---
+def search_error(e: Exception, query: str) -> HTTPException:
+    # Logs the failure with its traceback and maps it to a status the client can act on
+    errors_total.inc(type=type(e).__name__)
+    if is_timeout(e):
+        logger.warning("Search deadline exceeded for query %r", query)
+        return HTTPException(status_code=504, detail="Search timed out, please retry")
+    logger.exception("Search failed for query %r", query)
+    if isinstance(e, PyMongoError):
+        return HTTPException(status_code=503, detail="Search backend unavailable, please retry")
+    return HTTPException(status_code=500, detail="Search failed")
+
+def overloaded(e: Overloaded) -> HTTPException:
+    return HTTPException(status_code=503, detail="Search is overloaded, please retry", headers={"Retry-After": str(e.retry_after)})
+
+# --- Streaming ---
+def ndjson(event: dict) -> str:
+    return json.dumps(event, default=str) + "\n"
+
+async def search_events(request: QueryRequest, deadline: float):
+    # Emits a provisional vector-only page as soon as that leg lands, then the reranked page
+    set_deadline(deadline)
+    query, k, filters = request.query, request.k, request.active()
+    paged = request.page_size is not None
+    page_size = request.page_size if paged else k
+    fields = LIST_FIELDS if paged else RESULT_FIELDS
+    state = {"q": query, "k": k, "o": 0, "s": page_size, "f": filters}
+    try:
+        async with admission.slot():
+            version = await collection_version.current()
+            key = search_cache_key(version, query, k, view="rank", **filters)
+            ranked = search_cache.get(key)
+            if ranked is None:
+                with reserve():
+                    vector_task = asyncio.ensure_future(vector_leg(query, k, RANK_FIELDS, filters=filters))
+                    text_task = asyncio.ensure_future(text_leg(query, k, RANK_FIELDS, filters))
+                try:
+                    try:
+                        vector_results = await vector_task
+                    except Exception as e:
+                        vector_results = e
+                    if not isinstance(vector_results, Exception):
+                        provisional = rerank([dict(d) for d in vector_results], query, page_size)
+                        yield ndjson({"event": "provisional", "source": "vector", "results": await hydrate(provisional, fields)})
+                    try:
+                        text_results = await text_task
+                    except Exception as e:
+                        text_results = e
+                finally:
+                    # Client gone or stream closed early: stop both legs, not just the one pending
+                    legs = (vector_task, text_task)
+                    for task in legs:
+                        task.cancel()
+                    await asyncio.gather(*legs, return_exceptions=True)
+                ranked = combine(query, k, vector_results, text_results)
+                if not ranked.partial:
+                    search_cache.put(key, ranked)
+            yield ndjson({"event": "final", **(await page_response(ranked, state, fields))})
+    except Exception as e:
+        if isinstance(e, Overloaded):
+            error = overloaded(e)
+        else:
+            error = e if isinstance(e, HTTPException) else search_error(e, query)
+        yield ndjson({"event": "error", "status": error.status_code, "detail": error.detail})
+
+# --- Search routes: each gets a deadline (queue wait included) and an admission slot ---
+@router.post("/search")
+async def search_heritage_data(request: QueryRequest, x_request_timeout_ms: Optional[float] = Header(None)):
+    start_deadline(x_request_timeout_ms)
+    try:
+        async with admission.slot():
+            k = getattr(request, "k", 20)
+            version = await collection_version.current()
+            if request.page_size is not None or request.cursor:
+                return await paged_search(request, version)
+            filters = request.active()
+            key = search_cache_key(version, request.query, k, **filters)
+            combined_results = await search_cache.get_or_compute(
+                key, lambda: hybrid_search(request.query, k, filters=filters)
+            )
+            return with_partial({"results": combined_results}, combined_results)
+
+    except HTTPException:
+        raise
+    except Overloaded as e:
+        raise overloaded(e)
+    except Exception as e:
+        raise search_error(e, request.query)
+
+@router.post("/search/stream")
+async def stream_search_heritage_data(request: QueryRequest, x_request_timeout_ms: Optional[float] = Header(None)):
+    deadline = start_deadline(x_request_timeout_ms)
+    try:
+        # Shed with a real 503 while we still can; waiting for a slot happens inside the stream
+        admission.check()
+    except Overloaded as e:
+        raise overloaded(e)
+    return StreamingResponse(search_events(request, deadline), media_type="application/x-ndjson")
+
+@router.post("/search/batch")
+async def batch_search_heritage_data(request: BatchQueryRequest, x_request_timeout_ms: Optional[float] = Header(None)):
+    if not 0 < len(request.queries) <= MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"Send between 1 and {MAX_BATCH_QUERIES} queries")
+    start_deadline(x_request_timeout_ms)
+    try:
+        async with admission.slot():
+            return await batch_search(request)
+    except Overloaded as e:
+        raise overloaded(e)
+
+async def batch_search(request: BatchQueryRequest) -> dict:
+    k, filters = request.k, request.active()
+    try:
+        version = await collection_version.current()
+        # One embedding call for every query in the batch
+        with timed("embed"):
+            embeddings = await run_blocking(embed_queries, request.queries)
+    except Exception as e:
+        error = search_error(e, request.queries[0])
+        return {"results": [{"query": q, "error": error.detail} for q in request.queries]}
+
+    fanout = asyncio.Semaphore(BATCH_FANOUT)
+
+    async def search_one(query: str, embedding) -> dict:
+        async with fanout:
+            try:
+                results = await search_cache.get_or_compute(
+                    search_cache_key(version, query, k, **filters),
+                    lambda: hybrid_search(query, k, embedding=embedding, filters=filters),
+                )
+                return with_partial({"query": query, "results": results}, results)
+            except Exception as e:
+                return {"query": query, "error": search_error(e, query).detail}
+
+    return {"results": await asyncio.gather(*[
+        search_one(q, emb) for q, emb in zip(request.queries, embeddings)
+    ])}
+
+# --- Export ---
+def open_export_cursor(query: Optional[str], filters: dict, limit: Optional[int]):
+    # Lexical matches for a query (every hit, not just the top k), otherwise everything passing the filters
+    fields = {f: 1 for f in EXPORT_FIELDS}
+    if query and TEXT_BACKEND == "bm25":
+        index = lexical_index.get_lexical_index(artifacts)
+        ids = [_id for _id, _ in index.search(query, limit or len(index), filters)]
+        return artifacts.find({"_id": {"$in": ids}}, fields).batch_size(EXPORT_CHUNK_ROWS)
+    if query:
+        pipeline = build_text_pipeline(query, limit or 0, fields, filters)
+        if not limit:
+            pipeline = pipeline[:-1]
+        return artifacts.aggregate(pipeline, batchSize=EXPORT_CHUNK_ROWS)
+    cursor = artifacts.find(match_filter(filters), fields).batch_size(EXPORT_CHUNK_ROWS)
+    return cursor.limit(limit) if limit else cursor
+
+async def export_chunks(cursor, encoder):
+    # Each chunk is fetched only after the previous one was sent, so a slow client
+    # slows the cursor down instead of filling memory
+    try:
+        head = await run_blocking(encoder.start)
+        if head:
+            yield head
+        while True:
+            chunk = await run_blocking(encode_next_chunk, cursor, encoder)
+            if chunk is None:
+                break
+            if chunk:
+                yield chunk
+        tail = await run_blocking(encoder.finish)
+        if tail:
+            yield tail
+    finally:
+        await run_blocking(cursor.close)
+
+@router.get("/export")
+async def export_artifacts(
+    format: str = "csv",
+    query: Optional[str] = None,
+    region: Optional[str] = None,
+    period: Optional[str] = None,
+    themes: Optional[List[str]] = Query(None),
+    limit: Optional[int] = None,
+):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if limit is not None and limit <= 0:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    try:
+        encoder = make_encoder(format)
+    except ImportError:
+        raise HTTPException(status_code=501, detail="Parquet export needs the pyarrow package on the API server")
+    filters = SearchFilters(region=region, period=period, themes=themes).active()
+    try:
+        cursor = await run_blocking(open_export_cursor, query, filters, limit)
+    except Exception as e:
+        raise search_error(e, query or "")
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        export_chunks(cursor, encoder),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="artifacts.{extension}"'},
+    )
+
+@router.get("/facets")
+async def get_facets():
+    # Region/period/theme counts, recomputed at most once per collection version
+    version = await collection_version.current()
+    return await search_cache.get_or_compute(("facets", version), lambda: run_blocking(facet_counts.get, version))
+
+@router.get("/artifacts/{artifact_id}")
+async def get_artifact(artifact_id: str):
+    found = await run_blocking(load_fields, [artifact_id], RESULT_FIELDS)
+    doc = found.get(artifact_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    doc["_id"] = artifact_id
+    return doc
+
+def load_neighbors(artifact_id: str, k: int) -> Optional[dict]:
+    # Lists written by ai_loader/precompute_neighbors.py, best first, with card fields inline.
+    # Inclusion projection: without "_id": 1 the $slice alone would return the whole document
+    return artifacts.find_one({"_id": to_object_id(artifact_id)}, {"_id": 1, "neighbors": {"$slice": k}})
+
+@router.get("/artifacts/{artifact_id}/similar")
+async def get_similar_artifacts(artifact_id: str, k: int = 10):
+    if not 0 < k <= MAX_SIMILAR:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {MAX_SIMILAR}")
+    try:
+        doc = await run_blocking(load_neighbors, artifact_id, k)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Artifact not found")
+        if doc.get("neighbors") is not None:
+            return {"source": "precomputed", "results": [{**n, "_id": str(n["_id"])} for n in doc["neighbors"]]}
+
+        # Not precomputed yet: vector search with the stored embedding (no embedding call)
+        stored = await run_blocking(artifacts.find_one, {"_id": doc["_id"]}, {"embedding": 1})
+        if not stored or stored.get("embedding") is None:
+            return {"source": "none", "results": []}
+        hits = await vector_leg("", k + 1, LIST_FIELDS, embedding=decode_vector(stored["embedding"]))
+        # vectorSearchScore is (1 + cosine) / 2; report plain cosine like the precomputed lists
+        results = [
+            {**{f: hit.get(f, "") for f in LIST_FIELDS}, "_id": str(hit["_id"]), "score": 2.0 * hit.get("vector_score", 0.5) - 1.0}
+            for hit in hits if str(hit["_id"]) != str(doc["_id"])
+        ]
+        return {"source": "vector_search", "results": results[:k]}
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise search_error(e, f"similar:{artifact_id}")
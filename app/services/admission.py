@@ -0,0 +1,74 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+# Requests searching at once, and how many more may wait for a slot before new ones are shed
+SEARCH_MAX_IN_FLIGHT = int(os.environ.get("SEARCH_MAX_IN_FLIGHT", 32))
+SEARCH_MAX_QUEUE = int(os.environ.get("SEARCH_MAX_QUEUE", 64))
+SEARCH_QUEUE_TIMEOUT_MS = float(os.environ.get("SEARCH_QUEUE_TIMEOUT_MS", 1000))
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Server is busy, please retry")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded in-flight limit with a bounded wait queue.
+
+    A request that finds the queue full, or waits longer than the queue
+    timeout, is rejected immediately so it can be retried elsewhere instead
+    of piling up behind work the client will have abandoned.
+    """
+
+    def __init__(self, max_in_flight: int = SEARCH_MAX_IN_FLIGHT, max_queue: int = SEARCH_MAX_QUEUE,
+                 queue_timeout_ms: float = SEARCH_QUEUE_TIMEOUT_MS):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout_ms / 1000.0
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+
+    def _retry_after(self) -> int:
+        return max(1, int(round(self.queue_timeout)))
+
+    def check(self):
+        # Sheds up front when even the queue is full, e.g. before a streaming response commits to 200
+        if self._slots.locked() and self.queued >= self.max_queue:
+            self.shed += 1
+            raise Overloaded(self._retry_after())
+
+    async def acquire(self):
+        if self._slots.locked():
+            self.check()
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                raise Overloaded(self._retry_after())
+            finally:
+                self.queued -= 1
+        else:
+            await self._slots.acquire()
+        self.in_flight += 1
+        self.admitted += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        return {"in_flight": self.in_flight, "queued": self.queued, "admitted": self.admitted, "shed": self.shed}
@@ -0,0 +1,53 @@
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+# Used until ai_loader/tune_num_candidates.py has stored a policy for the collection
+DEFAULT_CANDIDATE_RATIO = float(os.environ.get("NUM_CANDIDATES_RATIO", 10))
+MIN_CANDIDATES = 100  # Floor for the untuned ratio only
+MAX_CANDIDATES = 10000  # Atlas upper bound for numCandidates
+POLICY_REFRESH_SECONDS = float(os.environ.get("NUM_CANDIDATES_POLICY_REFRESH", 300))
+
+
+class CandidatePolicy:
+    """Chooses $vectorSearch numCandidates for a given k.
+
+    The tuning job stores, per tuned k, the smallest numCandidates that met its
+    recall target. Other k values use the candidate/k ratio of the next tuned k up.
+    """
+
+    def __init__(self, meta_coll, collection_name: str, refresh_seconds: float = POLICY_REFRESH_SECONDS):
+        self.meta_coll = meta_coll
+        self.doc_id = f"num_candidates:{collection_name}"
+        self.refresh_seconds = refresh_seconds
+        self.policy: Dict[int, int] = {}
+        self._loaded = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[int, int]:
+        doc = self.meta_coll.find_one({"_id": self.doc_id}, {"policy": 1})
+        policy = {int(k): int(v) for k, v in (doc or {}).get("policy", {}).items()}
+        with self._lock:
+            self.policy = policy
+            self._loaded = time.monotonic()
+        return policy
+
+    def _current(self) -> Dict[int, int]:
+        if time.monotonic() - self._loaded > self.refresh_seconds:
+            try:
+                return self.load()
+            except Exception:
+                self._loaded = time.monotonic()  # Keep serving the last policy; retry later
+        return self.policy
+
+    def num_candidates(self, k: int, policy: Optional[Dict[int, int]] = None) -> int:
+        policy = self._current() if policy is None else policy
+        if policy:
+            tuned = [t for t in sorted(policy) if t >= k] or [max(policy)]
+            # A tuned value already met the recall target, so only floor at k
+            candidates = max(math.ceil(k * policy[tuned[0]] / tuned[0]), k)
+        else:
+            candidates = max(math.ceil(k * DEFAULT_CANDIDATE_RATIO), MIN_CANDIDATES, k)
+        return min(candidates, MAX_CANDIDATES)
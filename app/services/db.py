@@ -4,12 +4,36 @@ from pymongo import MongoClient
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.environ.get("MONGO_DB_NAME")
 COLLECTION = os.environ.get("MONGO_COLLECTION")
+META_COLLECTION = os.environ.get("MONGO_META_COLLECTION", "heritage_lens_meta")
 
+# --- Pool sizing (per worker process) ---
+MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", 50))
+MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", 4))   # Opened during warm-up, kept open
+MAX_IDLE_TIME_MS = int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", 300000))
+
+# --- Timeouts: fail fast when the cluster is unreachable instead of holding the request ---
+SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 3000))
+CONNECT_TIMEOUT_MS = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 5000))
+
+# connect=False: no sockets or monitor threads at import; the lifespan hook warms the pool
 client = MongoClient(
     MONGO_URI,
     tls=True,
     tlsCAFile='/etc/ssl/certs/ca-certificates.crt',
-    serverSelectionTimeoutMS=30000
+    serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS,
+    connectTimeoutMS=CONNECT_TIMEOUT_MS,
+    maxPoolSize=MAX_POOL_SIZE,
+    minPoolSize=MIN_POOL_SIZE,
+    maxIdleTimeMS=MAX_IDLE_TIME_MS,
+    connect=False,
 )
 db = client[DB_NAME]
 artifacts = db[COLLECTION]
+meta = db[META_COLLECTION]
+
+def ping():
+    # Forces server selection and opens the first pooled connection
+    client.admin.command("ping")
+
+def close():
+    client.close()
@@ -0,0 +1,47 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# Overall budget for one search request; keep it below the UI's 15 s client timeout
+SEARCH_DEADLINE_MS = float(os.environ.get("SEARCH_DEADLINE_MS", 8000))
+# Held back from the search legs so a partial answer can still be merged and hydrated
+SEARCH_DEADLINE_RESERVE_MS = float(os.environ.get("SEARCH_DEADLINE_RESERVE_MS", 500))
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+def start_deadline(budget_ms: Optional[float] = None) -> float:
+    # Clients may ask for a shorter budget (X-Request-Timeout-Ms), never a longer one
+    budget = SEARCH_DEADLINE_MS if budget_ms is None else min(float(budget_ms), SEARCH_DEADLINE_MS)
+    deadline = time.monotonic() + max(budget, 0.0) / 1000.0
+    _deadline.set(deadline)
+    return deadline
+
+def set_deadline(deadline: Optional[float]):
+    # For work that runs outside the request's task, e.g. a streaming response body
+    _deadline.set(deadline)
+
+def current_deadline() -> Optional[float]:
+    return _deadline.get()
+
+def remaining(deadline: Optional[float] = None) -> Optional[float]:
+    # Seconds left (possibly negative), or None when no deadline is set
+    deadline = _deadline.get() if deadline is None else deadline
+    return None if deadline is None else deadline - time.monotonic()
+
+@contextmanager
+def reserve(ms: float = SEARCH_DEADLINE_RESERVE_MS):
+    # Tightens the deadline for tasks started inside the block (they copy the context)
+    deadline = _deadline.get()
+    if deadline is None:
+        yield
+        return
+    # Never more than a quarter of what is left, so short client budgets still reach the legs
+    held_back = min(ms / 1000.0, max(deadline - time.monotonic(), 0.0) / 4)
+    token = _deadline.set(deadline - held_back)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
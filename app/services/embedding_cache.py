@@ -0,0 +1,121 @@
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def normalize_query(query: str) -> str:
+    # Case and whitespace differences should not cost another embedding call
+    return " ".join(query.casefold().split())
+
+
+class EmbeddingCache:
+    """Bounded LRU/TTL cache for query embeddings, keyed by (model, normalized query).
+
+    When ``disk_path`` is set, entries are also written to a small SQLite file so
+    a restarted worker starts warm.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 86400, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if disk_path:
+            self._open_disk(disk_path)
+
+    # --- Disk tier ---
+    def _open_disk(self, path: str):
+        self._disk = sqlite3.connect(path, check_same_thread=False)
+        self._disk.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            " model TEXT NOT NULL, query TEXT NOT NULL, vector BLOB NOT NULL, created REAL NOT NULL,"
+            " PRIMARY KEY (model, query))"
+        )
+        self._disk.execute("DELETE FROM query_embeddings WHERE created < ?", (time.time() - self.ttl_seconds,))
+        self._disk.commit()
+
+    def _disk_get(self, key: tuple):
+        row = self._disk.execute(
+            "SELECT vector, created FROM query_embeddings WHERE model = ? AND query = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        blob, created = row
+        if time.time() - created > self.ttl_seconds:
+            self._disk.execute("DELETE FROM query_embeddings WHERE model = ? AND query = ?", key)
+            self._disk.commit()
+            return None
+        return array("d", blob).tolist(), created
+
+    def _disk_put(self, key: tuple, vector: List[float], created: float):
+        self._disk.execute(
+            "INSERT OR REPLACE INTO query_embeddings (model, query, vector, created) VALUES (?, ?, ?, ?)",
+            (key[0], key[1], array("d", vector).tobytes(), created),
+        )
+        self._disk.commit()
+
+    # --- Public API ---
+    def get(self, query: str, model: str) -> Optional[List[float]]:
+        key = (model, normalize_query(query))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, created = entry
+                if now - created <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+                self.expirations += 1
+            if self._disk is not None:
+                stored = self._disk_get(key)
+                if stored is not None:
+                    self._insert(key, *stored)
+                    self.disk_hits += 1
+                    return stored[0]
+            self.misses += 1
+            return None
+
+    def put(self, query: str, model: str, vector: List[float]):
+        key = (model, normalize_query(query))
+        created = time.time()
+        vector = list(vector)
+        with self._lock:
+            self._insert(key, vector, created)
+            if self._disk is not None:
+                self._disk_put(key, vector, created)
+
+    def _insert(self, key: tuple, vector: List[float], created: float):
+        self._entries[key] = (vector, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM query_embeddings")
+                self._disk.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
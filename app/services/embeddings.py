@@ -0,0 +1,74 @@
+# app/services/embeddings.py
+#
+# Query embedding entry point for the API. EMBEDDING_BACKEND picks where
+# vectors come from and must match how the collection was embedded:
+#   vertex - Vertex AI text-embedding model (ai_loader/batch_embed_vertex.py)
+#   local  - SentenceTransformer on CPU with micro-batching (ai_loader/batch_embed_local.py)
+
+import os
+import threading
+from typing import List
+
+from app.services.embedding_cache import EmbeddingCache, normalize_query
+from app.services.metrics import embedding_calls, embedding_texts
+
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "vertex")
+
+# --- Query embedding cache (set EMBED_CACHE_PATH to keep entries across restarts) ---
+query_cache = EmbeddingCache(
+    max_entries=int(os.environ.get("EMBED_CACHE_SIZE", 10000)),
+    ttl_seconds=float(os.environ.get("EMBED_CACHE_TTL", 7 * 24 * 3600)),
+    disk_path=os.environ.get("EMBED_CACHE_PATH") or None,
+)
+
+# --- Process-wide backend (imported lazily so only the configured one is loaded) ---
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if EMBEDDING_BACKEND == "local":
+                    from app.services.local_embedder import LocalEmbedder
+                    _backend = LocalEmbedder()
+                elif EMBEDDING_BACKEND == "vertex":
+                    from app.services.vertexai import VertexEmbedder
+                    _backend = VertexEmbedder()
+                else:
+                    raise ValueError(f"Unknown EMBEDDING_BACKEND: {EMBEDDING_BACKEND}")
+    return _backend
+
+def warm_up():
+    # Loads the model (or SDK client) and runs one request outside the cache and metrics
+    get_backend().embed(["warm up"])
+
+def _embed(backend, texts: List[str]) -> List[List[float]]:
+    embedding_calls.inc(backend=EMBEDDING_BACKEND)
+    embedding_texts.inc(len(texts), backend=EMBEDDING_BACKEND)
+    return backend.embed(texts)
+
+def embed_query(query: str):
+    backend = get_backend()
+    cached = query_cache.get(query, backend.model_name)
+    if cached is not None:
+        return cached
+    vector = _embed(backend, [query])[0]
+    query_cache.put(query, backend.model_name, vector)
+    return vector
+
+def embed_queries(queries: List[str]) -> List[List[float]]:
+    # Cached queries are served locally; the rest go to the backend in one call
+    backend = get_backend()
+    vectors = [query_cache.get(q, backend.model_name) for q in queries]
+    missing = {}
+    for q, vec in zip(queries, vectors):
+        if vec is None:
+            missing.setdefault(normalize_query(q), q)
+    texts = list(missing.values())
+    fresh = {}
+    for text, vector in zip(texts, _embed(backend, texts) if texts else []):
+        query_cache.put(text, backend.model_name, vector)
+        fresh[normalize_query(text)] = vector
+    return [vec if vec is not None else fresh[normalize_query(q)] for q, vec in zip(queries, vectors)]
@@ -0,0 +1,34 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import pymongo
+
+from app.services.deadline import current_deadline, remaining
+
+# Bounded pool for blocking calls (pymongo, embedding SDKs) made from async routes
+SEARCH_WORKERS = int(os.environ.get("SEARCH_WORKERS", 16))
+
+executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="search")
+
+def _within(deadline, fn, *args, **kwargs):
+    # Time spent queued for a worker counts against the budget
+    budget = remaining(deadline)
+    if budget <= 0:
+        raise TimeoutError("Deadline exceeded before the call started")
+    # pymongo applies this to server selection, connection checkout and maxTimeMS
+    with pymongo.timeout(budget):
+        return fn(*args, **kwargs)
+
+async def run_blocking(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    deadline = current_deadline()
+    if deadline is None:
+        return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+    budget = remaining(deadline)
+    if budget <= 0:
+        raise TimeoutError("Deadline exceeded")
+    # wait_for also bounds calls pymongo.timeout can't reach (embedding SDKs); the
+    # worker thread finishes on its own but the request stops waiting for it
+    return await asyncio.wait_for(loop.run_in_executor(executor, partial(_within, deadline, fn, *args, **kwargs)), budget)
@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+import os
+from itertools import islice
+from typing import Iterable, List, Optional
+
+# Rows fetched from the cursor and encoded per chunk; memory is bounded by one chunk
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", 1000))
+EXPORT_FIELDS = ["_id", "title", "region", "period", "themes", "description", "image_url", "reference_link"]
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def flatten(doc: dict) -> dict:
+    row = {}
+    for field in EXPORT_FIELDS:
+        value = doc.get(field)
+        if field == "themes":
+            row[field] = [str(t) for t in value] if isinstance(value, list) else []
+        else:
+            row[field] = "" if value is None else str(value)
+    return row
+
+
+class CsvEncoder:
+    def start(self) -> bytes:
+        return self._write([EXPORT_FIELDS])
+
+    def encode(self, rows: List[dict]) -> bytes:
+        return self._write([[("; ".join(r[f]) if f == "themes" else r[f]) for f in EXPORT_FIELDS] for r in rows])
+
+    def finish(self) -> bytes:
+        return b""
+
+    def _write(self, lines) -> bytes:
+        buf = io.StringIO()
+        csv.writer(buf).writerows(lines)
+        return buf.getvalue().encode("utf-8")
+
+
+class NdjsonEncoder:
+    def start(self) -> bytes:
+        return b""
+
+    def encode(self, rows: List[dict]) -> bytes:
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _Sink(io.RawIOBase):
+    # Write-only file that hands back whatever the Parquet writer produced since the last drain
+    def __init__(self):
+        self._chunks = []
+        self._written = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._written += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._written
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ParquetEncoder:
+    """One row group per chunk; needs the optional pyarrow package."""
+
+    def __init__(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.schema = pa.schema([
+            (f, pa.list_(pa.string()) if f == "themes" else pa.string()) for f in EXPORT_FIELDS
+        ])
+        self.sink = _Sink()
+        self.writer = pq.ParquetWriter(self.sink, self.schema, compression="snappy")
+
+    def start(self) -> bytes:
+        return self.sink.drain()
+
+    def encode(self, rows: List[dict]) -> bytes:
+        self.writer.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+        return self.sink.drain()
+
+    def finish(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+
+def make_encoder(fmt: str):
+    if fmt == "csv":
+        return CsvEncoder()
+    if fmt == "ndjson":
+        return NdjsonEncoder()
+    if fmt == "parquet":
+        return ParquetEncoder()
+    raise ValueError(f"Unknown export format '{fmt}'")
+
+def encode_next_chunk(cursor: Iterable[dict], encoder, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Optional[bytes]:
+    # Runs in the executor: pulls one chunk from the Mongo cursor and encodes it
+    rows = [flatten(doc) for doc in islice(cursor, chunk_rows)]
+    if not rows:
+        return None
+    return encoder.encode(rows)
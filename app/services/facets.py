@@ -0,0 +1,61 @@
+import os
+from datetime import datetime
+
+FACET_FIELDS = ("region", "period", "themes")
+FACET_LIMIT = int(os.environ.get("FACET_LIMIT", 200))  # Values returned per facet
+
+
+class FacetCounts:
+    """Filter-option counts stored in the meta collection, one set per collection version.
+
+    The first worker to see a new version runs the aggregation and saves the result;
+    every other request is a single find_one.
+    """
+
+    def __init__(self, coll, meta_coll, collection_name: str):
+        self.coll = coll
+        self.meta_coll = meta_coll
+        self.doc_id = f"facets:{collection_name}"
+
+    def compute(self) -> dict:
+        not_blank = {"$nin": ["", None]}
+        pipeline = [{
+            "$facet": {
+                "region": [
+                    {"$match": {"region": not_blank}},
+                    {"$group": {"_id": "$region", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1, "_id": 1}},
+                    {"$limit": FACET_LIMIT},
+                ],
+                "period": [
+                    {"$match": {"period": not_blank}},
+                    {"$group": {"_id": "$period", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1, "_id": 1}},
+                    {"$limit": FACET_LIMIT},
+                ],
+                "themes": [
+                    {"$unwind": "$themes"},
+                    {"$match": {"themes": not_blank}},
+                    {"$group": {"_id": "$themes", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1, "_id": 1}},
+                    {"$limit": FACET_LIMIT},
+                ],
+            }
+        }]
+        row = next(self.coll.aggregate(pipeline), {})
+        return {
+            field: [{"value": b["_id"], "count": b["count"]} for b in row.get(field, [])]
+            for field in FACET_FIELDS
+        }
+
+    def get(self, version: int) -> dict:
+        doc = self.meta_coll.find_one({"_id": self.doc_id})
+        if doc and doc.get("version") == version:
+            return doc["counts"]
+        counts = self.compute()
+        self.meta_coll.update_one(
+            {"_id": self.doc_id},
+            {"$set": {"version": version, "counts": counts, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+        return counts
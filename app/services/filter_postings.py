@@ -0,0 +1,65 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+# Same fields and semantics as the Mongo filter: region/period must equal, themes match any
+FILTER_FIELDS = ("region", "period", "themes")
+
+
+class FilterPostings:
+    """Row sets per filter value, kept next to an in-process index.
+
+    A filtered query intersects these sets instead of asking Mongo for the
+    ids of every matching document first.
+    """
+
+    def __init__(self):
+        self._rows: Dict[str, Dict[str, set]] = {field: {} for field in FILTER_FIELDS}
+        self._values: Dict[int, list] = {}  # row -> [(field, value)], so a row can be removed
+
+    def set(self, row: int, doc: dict):
+        self.discard(row)
+        pairs = []
+        for field in FILTER_FIELDS:
+            value = doc.get(field)
+            for v in value if isinstance(value, list) else [value]:
+                if isinstance(v, str) and v:
+                    self._rows[field].setdefault(v, set()).add(row)
+                    pairs.append((field, v))
+        if pairs:
+            self._values[row] = pairs
+
+    def discard(self, row: int):
+        for field, value in self._values.pop(row, ()):
+            rows = self._rows[field].get(value)
+            rows.discard(row)
+            if not rows:
+                del self._rows[field][value]
+
+    def rows(self, filters: Optional[dict]) -> Optional[np.ndarray]:
+        # Sorted rows passing every active filter, or None when nothing is filtered
+        matched = None
+        for field in FILTER_FIELDS:
+            wanted = (filters or {}).get(field)
+            if not wanted:
+                continue
+            values = wanted if isinstance(wanted, list) else [wanted]
+            field_rows = set().union(*(self._rows[field].get(v, ()) for v in values))
+            matched = field_rows if matched is None else matched & field_rows
+        if matched is None:
+            return None
+        return np.fromiter(sorted(matched), dtype=np.int64, count=len(matched))
+
+    # --- Snapshots (stored in the index's meta.json) ---
+    def to_json(self) -> dict:
+        return {field: {value: sorted(rows) for value, rows in by_value.items()} for field, by_value in self._rows.items()}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "FilterPostings":
+        postings = cls()
+        for field, by_value in data.items():
+            for value, rows in by_value.items():
+                postings._rows[field][value] = set(rows)
+                for row in rows:
+                    postings._values.setdefault(row, []).append((field, value))
+        return postings
@@ -0,0 +1,256 @@
+import os
+import re
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId, json_util
+
+from app.services.filter_postings import FILTER_FIELDS, FilterPostings
+
+# Snapshot directory for fast cold starts; refresh interval for picking up new documents
+LEXICAL_INDEX_PATH = os.environ.get("LEXICAL_INDEX_PATH", "")
+LEXICAL_INDEX_REFRESH_SECONDS = float(os.environ.get("LEXICAL_INDEX_REFRESH_SECONDS", 300))
+
+# Same fields as the $search leg; a title hit counts three times a description hit
+FIELD_WEIGHTS = {"title": 3.0, "description": 1.0, "region": 2.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+REFRESH_OVERLAP = timedelta(seconds=60)
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 or t.isdigit()]
+
+
+class LexicalIndex:
+    """In-process BM25 index over title, description and region.
+
+    Postings are typed arrays per term (document row, field-weighted term
+    frequency), so a query is a few vectorized passes over the postings of
+    its terms. A changed document gets a new row and its old row is masked out.
+    Filters are applied from region/period/themes postings kept alongside.
+    """
+
+    def __init__(self):
+        self.ids: List = []
+        self._pos: Dict = {}
+        self._stamps: Dict = {}        # id -> embedded_at of the indexed text
+        self.terms: Dict[str, int] = {}
+        self._docs: List[array] = []   # term -> document rows
+        self._tfs: List[array] = []    # term -> weighted term frequencies
+        self._lengths = array("f")     # row -> weighted document length
+        self._alive = array("b")       # row -> 1 unless superseded
+        self._total_length = 0.0
+        self._live = 0
+        self.filters = FilterPostings()
+        self._lock = threading.RLock()
+        self.watermark = None          # Newest embedded_at seen (re-embeds mean the text changed)
+        self.max_id = None             # Newest ObjectId seen (new inserts)
+        self.last_refresh = 0.0
+
+    def __len__(self):
+        return self._live
+
+    # --- Building ---
+    def add(self, doc: dict):
+        counts: Dict[str, float] = {}
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(doc.get(field) or ""):
+                counts[token] = counts.get(token, 0.0) + weight
+                length += weight
+        with self._lock:
+            row = len(self._lengths)
+            self._lengths.append(length)
+            self._alive.append(1)
+            for token, tf in counts.items():
+                term = self.terms.get(token)
+                if term is None:
+                    term = self.terms[token] = len(self._docs)
+                    self._docs.append(array("i"))
+                    self._tfs.append(array("f"))
+                self._docs[term].append(row)
+                self._tfs[term].append(tf)
+            old = self._pos.get(doc["_id"])
+            if old is not None and self._alive[old]:
+                self._alive[old] = 0
+                self.filters.discard(old)
+                self._total_length -= self._lengths[old]
+                self._live -= 1
+            self.filters.set(row, doc)
+            self._total_length += length
+            self._live += 1
+            # The row is complete; only now does its id point at it
+            self.ids.append(doc["_id"])
+            self._pos[doc["_id"]] = row
+
+    def _load_cursor(self, cursor) -> int:
+        count = 0
+        for doc in cursor:
+            stamp = doc.get("embedded_at")
+            if doc["_id"] in self._pos and stamp is not None and self._stamps.get(doc["_id"]) == stamp:
+                continue  # Already indexed; refresh windows overlap
+            self.add(doc)
+            self._stamps[doc["_id"]] = stamp
+            count += 1
+            if stamp is not None and (self.watermark is None or stamp > self.watermark):
+                self.watermark = stamp
+            if isinstance(doc["_id"], ObjectId) and (self.max_id is None or doc["_id"] > self.max_id):
+                self.max_id = doc["_id"]
+        self.last_refresh = time.time()
+        return count
+
+    def _projection(self) -> dict:
+        return {**{f: 1 for f in FIELD_WEIGHTS}, **{f: 1 for f in FILTER_FIELDS}, "embedded_at": 1}
+
+    def load_from_collection(self, coll) -> int:
+        started = datetime.utcnow()
+        count = self._load_cursor(coll.find({}, self._projection()))
+        if self.watermark is None:
+            self.watermark = started
+        return count
+
+    def refresh(self, coll) -> int:
+        # New inserts (by ObjectId) plus documents re-embedded since the last load
+        if self.watermark is None and self.max_id is None:
+            return self.load_from_collection(coll)
+        clauses = []
+        if self.max_id is not None:
+            clauses.append({"_id": {"$gt": self.max_id}})
+        if self.watermark is not None:
+            clauses.append({"embedded_at": {"$gte": self.watermark - REFRESH_OVERLAP}})
+        return self._load_cursor(coll.find({"$or": clauses}, self._projection()))
+
+    # --- Querying ---
+    def search(self, query: str, k: int, filters: Optional[dict] = None) -> List[Tuple[object, float]]:
+        # `filters` (region/period/themes) restricts results to the rows in their postings
+        tokens = set(tokenize(query))
+        with self._lock:
+            rows = len(self._lengths)
+            if not rows or not self._live:
+                return []
+            scores, alive = self._scores(tokens, rows)
+            mask = alive & (scores > 0)
+            allowed_rows = self.filters.rows(filters)
+            if allowed_rows is not None:
+                allowed = np.zeros(rows, dtype=bool)
+                allowed[allowed_rows] = True
+                mask &= allowed
+            hits = np.flatnonzero(mask)
+            ids = self.ids
+        if not len(hits):
+            return []
+        k = min(k, len(hits))
+        top = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(ids[r], float(scores[r])) for r in top]
+
+    def _scores(self, tokens, rows: int):
+        # Call with the lock held. The frombuffer views pin the arrays (append() raises
+        # BufferError while one exists), so they must not outlive this call
+        lengths = np.frombuffer(self._lengths, dtype=np.float32, count=rows)
+        alive = np.frombuffer(self._alive, dtype=np.int8, count=rows).astype(bool)
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * lengths / max(self._total_length / self._live, 1e-9))
+        scores = np.zeros(rows, dtype=np.float32)
+        for token in tokens:
+            term = self.terms.get(token)
+            if term is None:
+                continue
+            docs = np.frombuffer(self._docs[term], dtype=np.int32)
+            tfs = np.frombuffer(self._tfs[term], dtype=np.float32)
+            df = int(alive[docs].sum())
+            idf = np.log(1.0 + (self._live - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * tfs * (BM25_K1 + 1.0) / (tfs + norm[docs])
+        return scores, alive
+
+    # --- Snapshots ---
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            offsets = np.zeros(len(self._docs) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(d) for d in self._docs])
+            postings_tmp = os.path.join(path, "postings.tmp.npz")
+            with open(postings_tmp, "wb") as f:
+                np.savez(
+                    f,
+                    offsets=offsets,
+                    docs=np.concatenate([np.frombuffer(d, dtype=np.int32) for d in self._docs] or [np.empty(0, np.int32)]),
+                    tfs=np.concatenate([np.frombuffer(t, dtype=np.float32) for t in self._tfs] or [np.empty(0, np.float32)]),
+                    lengths=np.frombuffer(self._lengths, dtype=np.float32),
+                    alive=np.frombuffer(self._alive, dtype=np.int8),
+                )
+            meta = {
+                "ids": self.ids,
+                "terms": sorted(self.terms, key=self.terms.get),
+                "watermark": self.watermark,
+                "max_id": self.max_id,
+                "filters": self.filters.to_json(),
+            }
+            meta_tmp = os.path.join(path, "meta.json.tmp")
+            with open(meta_tmp, "w") as f:
+                f.write(json_util.dumps(meta))
+            os.replace(postings_tmp, os.path.join(path, "postings.npz"))
+            os.replace(meta_tmp, os.path.join(path, "meta.json"))
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json_util.loads(f.read())
+        if "filters" not in meta:
+            return cls()  # Snapshot predates filter postings; rebuild from the collection
+        data = np.load(os.path.join(path, "postings.npz"))
+        index = cls()
+        index.ids = list(meta["ids"])
+        index.terms = {term: i for i, term in enumerate(meta["terms"])}
+        offsets, docs, tfs = data["offsets"], data["docs"], data["tfs"]
+        for i in range(len(index.terms)):
+            index._docs.append(array("i", docs[offsets[i]:offsets[i + 1]].tobytes()))
+            index._tfs.append(array("f", tfs[offsets[i]:offsets[i + 1]].tobytes()))
+        index._lengths = array("f", data["lengths"].tobytes())
+        index._alive = array("b", data["alive"].tobytes())
+        alive = data["alive"].astype(bool)
+        index._live = int(alive.sum())
+        index._total_length = float(data["lengths"][alive].sum())
+        # Latest row wins for ids that were re-added
+        index._pos = {_id: row for row, _id in enumerate(index.ids)}
+        index.filters = FilterPostings.from_json(meta["filters"])
+        index.watermark = meta.get("watermark")
+        index.max_id = meta.get("max_id")
+        return index
+
+
+# --- Process-wide index used by the "bm25" text backend ---
+_index: Optional[LexicalIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_lexical_index(coll) -> LexicalIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                snapshot = LEXICAL_INDEX_PATH and os.path.exists(os.path.join(LEXICAL_INDEX_PATH, "meta.json"))
+                index = LexicalIndex.load(LEXICAL_INDEX_PATH) if snapshot else LexicalIndex()
+                index.refresh(coll)
+                if LEXICAL_INDEX_PATH:
+                    index.save(LEXICAL_INDEX_PATH)
+                _index = index
+    return _index
+
+
+def maybe_refresh(coll):
+    index = get_lexical_index(coll)
+    if time.time() - index.last_refresh < LEXICAL_INDEX_REFRESH_SECONDS:
+        return
+    if _index_lock.acquire(blocking=False):
+        try:
+            if index.refresh(coll) and LEXICAL_INDEX_PATH:
+                index.save(LEXICAL_INDEX_PATH)
+        finally:
+            _index_lock.release()
@@ -0,0 +1,82 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List
+
+# Must match the model the collection was embedded with (see ai_loader/batch_embed_local.py)
+LOCAL_EMBED_MODEL = os.environ.get("LOCAL_EMBED_MODEL", "all-MiniLM-L6-v2")
+MAX_BATCH = int(os.environ.get("EMBED_MAX_BATCH", 32))
+MAX_WAIT_MS = float(os.environ.get("EMBED_BATCH_WAIT_MS", 5))
+
+
+class MicroBatcher:
+    """Groups texts submitted from concurrent requests into one forward pass.
+
+    A worker thread takes the first waiting text, keeps collecting for up to
+    ``max_wait_ms`` (or until ``max_batch`` texts), then encodes them together.
+    """
+
+    def __init__(self, encode, max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS):
+        self.encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self.batches = 0
+        self.texts = 0
+        # Started last: the worker uses everything above
+        self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                vectors = list(self.encode(texts))
+                if len(vectors) != len(batch):
+                    raise RuntimeError(f"Encoder returned {len(vectors)} vectors for {len(batch)} texts")
+            except Exception as e:
+                # Every caller in the batch gets the error; none is left waiting
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.texts += len(texts)
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+
+class LocalEmbedder:
+    model_name = LOCAL_EMBED_MODEL
+
+    def __init__(self):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(LOCAL_EMBED_MODEL, device="cpu")
+        self.batcher = MicroBatcher(self._encode)
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(texts, batch_size=len(texts)).tolist()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        futures = [self.batcher.submit(text) for text in texts]
+        return [future.result() for future in futures]
@@ -0,0 +1,85 @@
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+# Opt-in: set PROFILE_SLOW_REQUEST_MS to sample stacks while requests run and keep
+# the profile of any request slower than that. Profiles are written in folded-stack
+# format (one "frame;frame;frame count" line per stack) for flamegraph.pl or speedscope.
+PROFILE_SLOW_REQUEST_MS = float(os.environ.get("PROFILE_SLOW_REQUEST_MS", 0))
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 1.0))  # Fraction of requests profiled
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 5))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+logger = logging.getLogger(__name__)
+
+# One sampler at a time; samples cover every thread, so overlapping ones would double count
+_active = threading.Lock()
+
+
+def _folded(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Samples the Python stacks of all threads (event loop and executor workers) on an interval."""
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                self.samples[f"{names.get(ident, ident)};{_folded(frame)}"] += 1
+
+
+def start_profile() -> Optional[StackSampler]:
+    if PROFILE_SLOW_REQUEST_MS <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+        return None
+    if not _active.acquire(blocking=False):
+        return None
+    return StackSampler().start()
+
+def finish_profile(sampler: Optional[StackSampler], label: str, duration_ms: float):
+    if sampler is None:
+        return
+    try:
+        samples = sampler.stop()
+    finally:
+        _active.release()
+    if duration_ms < PROFILE_SLOW_REQUEST_MS or not samples:
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe_label = "".join(c if c.isalnum() else "_" for c in label).strip("_")
+    path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_label}-{int(duration_ms)}ms.folded")
+    with open(path, "w") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+    logger.warning("Slow request %s took %.0f ms; profile written to %s", label, duration_ms, path)
@@ -0,0 +1,74 @@
+import os
+import re
+from typing import Iterable, List
+
+import numpy as np
+
+# "legacy"     - raw vectorSearchScore + searchScore + 0.2 per query word in the title
+# "normalized" - each leg's scores min-max scaled to [0, 1] across the candidates, then weighted
+# "rrf"        - reciprocal rank fusion of the vector, text and title-match rankings
+RERANK_STRATEGY = os.environ.get("RERANK_STRATEGY", "legacy")
+RERANK_STRATEGIES = ("legacy", "normalized", "rrf")
+
+TITLE_BONUS = 0.2
+VECTOR_WEIGHT = float(os.environ.get("RERANK_VECTOR_WEIGHT", 0.5))
+TEXT_WEIGHT = float(os.environ.get("RERANK_TEXT_WEIGHT", 0.5))
+RRF_K = int(os.environ.get("RERANK_RRF_K", 60))
+
+_WORD = re.compile(r"\w+")
+
+
+def query_keywords(query: str) -> List[str]:
+    return [kw.lower() for kw in _WORD.findall(query)]
+
+def title_matches(docs: List[dict], keywords: List[str]) -> np.ndarray:
+    # Number of query keywords found in each title (substring match, as before)
+    counts = np.zeros(len(docs), dtype=np.float64)
+    if not keywords or not docs:
+        return counts
+    titles = np.array([(d.get("title") or "").lower() for d in docs], dtype=str)
+    for kw in keywords:
+        counts += np.char.find(titles, kw) >= 0
+    return counts
+
+def _minmax(scores: np.ndarray, present: np.ndarray) -> np.ndarray:
+    out = np.zeros_like(scores)
+    if not present.any():
+        return out
+    lo, hi = scores[present].min(), scores[present].max()
+    out[present] = 1.0 if hi == lo else (scores[present] - lo) / (hi - lo)
+    return out
+
+def _reciprocal_ranks(scores: np.ndarray, present: np.ndarray) -> np.ndarray:
+    out = np.zeros_like(scores)
+    rows = np.flatnonzero(present)
+    if len(rows):
+        order = rows[np.argsort(-scores[rows], kind="stable")]
+        out[order] = 1.0 / (RRF_K + np.arange(1, len(order) + 1))
+    return out
+
+def score(docs: List[dict], query: str, strategy: str = RERANK_STRATEGY) -> np.ndarray:
+    vector = np.array([d.get("vector_score", 0) or 0 for d in docs], dtype=np.float64)
+    text = np.array([d.get("text_score", 0) or 0 for d in docs], dtype=np.float64)
+    matches = title_matches(docs, query_keywords(query))
+    if strategy == "legacy":
+        return vector + text + matches * TITLE_BONUS
+    # Text-only hits carry vector_score 0 from merge_results; vector-only hits have no text_score
+    in_vector = vector > 0
+    in_text = np.array(["text_score" in d for d in docs], dtype=bool)
+    if strategy == "normalized":
+        return VECTOR_WEIGHT * _minmax(vector, in_vector) + TEXT_WEIGHT * _minmax(text, in_text) + matches * TITLE_BONUS
+    if strategy == "rrf":
+        return (_reciprocal_ranks(vector, in_vector)
+                + _reciprocal_ranks(text, in_text)
+                + _reciprocal_ranks(matches, matches > 0))
+    raise ValueError(f"Unknown RERANK_STRATEGY '{strategy}' (expected one of {', '.join(RERANK_STRATEGIES)})")
+
+def rerank(docs: Iterable[dict], query: str, k: int, strategy: str = RERANK_STRATEGY) -> List[dict]:
+    docs = list(docs)
+    if not docs:
+        return []
+    scores = score(docs, query, strategy)
+    # Stable, so ties keep merge order like the previous sorted(..., reverse=True)
+    order = np.argsort(-scores, kind="stable")[:k]
+    return [docs[i] for i in order]
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Optional
+
+from app.services.embedding_cache import normalize_query
+from app.services.executor import run_blocking
+
+SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", 2000))
+SEARCH_CACHE_TTL = float(os.environ.get("SEARCH_CACHE_TTL", 600))
+VERSION_POLL_SECONDS = float(os.environ.get("SEARCH_CACHE_VERSION_POLL", 5))
+
+
+def search_cache_key(version: int, query: str, k: int, **filters) -> tuple:
+    return (version, normalize_query(query), k, tuple(sorted((name, repr(value)) for name, value in filters.items())))
+
+
+class SearchCache:
+    """LRU/TTL cache of search responses with single-flight computation.
+
+    Concurrent requests for the same key await one shared computation instead
+    of each running the aggregations. Values flagged ``partial`` (a search leg
+    missed its deadline) are handed to waiters but never stored.
+    """
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_SIZE, ttl_seconds: float = SEARCH_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, created = entry
+        if time.monotonic() - created > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable]):
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # The computation runs as its own task so cancelling the request that
+            # started it (client gone) does not cancel it for the coalesced waiters
+            task = asyncio.ensure_future(self._compute(key, compute))
+            # Mark retrieved so a failure nobody else awaited is not logged
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable]):
+        try:
+            value = await compute()
+            if not getattr(value, "partial", False):
+                self.put(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
+
+
+class CollectionVersion:
+    """Polls the version stamp the ai_loader scripts bump after each load or re-embed."""
+
+    def __init__(self, meta_coll, collection_name: str, poll_seconds: float = VERSION_POLL_SECONDS):
+        self.meta_coll = meta_coll
+        self.doc_id = f"version:{collection_name}"
+        self.poll_seconds = poll_seconds
+        self.version: Optional[int] = None
+        self._fetched = 0.0
+
+    def fetch(self) -> int:
+        doc = self.meta_coll.find_one({"_id": self.doc_id}, {"version": 1})
+        self.version = doc["version"] if doc else 0
+        self._fetched = time.monotonic()
+        return self.version
+
+    async def current(self) -> int:
+        if self.version is None or time.monotonic() - self._fetched > self.poll_seconds:
+            return await run_blocking(self.fetch)
+        return self.version
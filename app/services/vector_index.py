@@ -0,0 +1,197 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from bson import json_util
+
+from app.services.filter_postings import FILTER_FIELDS, FilterPostings
+from app.services.vectors import decode_vector
+
+# Snapshot directory for fast cold starts; refresh interval for picking up new embeddings
+VECTOR_INDEX_PATH = os.environ.get("VECTOR_INDEX_PATH", "")
+VECTOR_INDEX_REFRESH_SECONDS = float(os.environ.get("VECTOR_INDEX_REFRESH_SECONDS", 300))
+
+# Loaders stamp "embedded_at"; overlap the watermark so concurrent writers aren't missed
+REFRESH_OVERLAP = timedelta(seconds=60)
+LOAD_BATCH = 5000
+LOAD_PROJECTION = {"embedding": 1, "embedded_at": 1, **{f: 1 for f in FILTER_FIELDS}}
+
+
+class LocalVectorIndex:
+    """In-process exact cosine index over the ``embedding`` field.
+
+    Vectors are L2-normalised and kept in one contiguous float32 matrix, so a
+    query is a single matrix-vector product followed by a partial sort.
+    Filtered queries score only the rows in the region/period/themes postings.
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim
+        self.ids: List = []
+        self._pos = {}
+        self._matrix = np.empty((0, dim or 0), dtype=np.float32)
+        self.filters = FilterPostings()
+        self._lock = threading.RLock()
+        self.watermark = None
+        self.last_refresh = 0.0
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix[: len(self.ids)]
+
+    # --- Building ---
+    def _ensure_capacity(self, rows: int):
+        capacity = self._matrix.shape[0]
+        if rows <= capacity and self._matrix.flags.writeable:
+            return
+        grown = np.empty((max(rows, capacity * 2, 1024), self.dim), dtype=np.float32)
+        grown[: len(self.ids)] = self._matrix[: len(self.ids)]
+        self._matrix = grown
+
+    def upsert(self, ids: Iterable, vectors, docs: Optional[List[dict]] = None) -> int:
+        # `docs` carries each id's filter fields (region/period/themes)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or not len(vectors):
+            return 0
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._matrix = np.empty((0, self.dim), dtype=np.float32)
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-d vectors, got {vectors.shape[1]}-d")
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-12)
+            ids = list(ids)
+            new = [i for i in ids if i not in self._pos]
+            self._ensure_capacity(len(self.ids) + len(new))
+            for i, (_id, vec) in enumerate(zip(ids, vectors)):
+                row = self._pos.get(_id)
+                if row is None:
+                    row = len(self.ids)
+                    self._pos[_id] = row
+                    self.ids.append(_id)
+                self._matrix[row] = vec
+                if docs is not None:
+                    self.filters.set(row, docs[i])
+            return len(ids)
+
+    def _load_cursor(self, cursor) -> int:
+        count = 0
+        ids, vectors, docs = [], [], []
+        for doc in cursor:
+            emb = doc.get("embedding")
+            if emb is None:
+                continue
+            emb = decode_vector(emb)
+            if not len(emb) or (self.dim is not None and len(emb) != self.dim):
+                continue
+            ids.append(doc["_id"])
+            vectors.append(emb)
+            docs.append(doc)
+            stamp = doc.get("embedded_at")
+            if stamp is not None and (self.watermark is None or stamp > self.watermark):
+                self.watermark = stamp
+            if len(ids) >= LOAD_BATCH:
+                count += self.upsert(ids, vectors, docs)
+                ids, vectors, docs = [], [], []
+        count += self.upsert(ids, vectors, docs)
+        self.last_refresh = time.time()
+        return count
+
+    def load_from_collection(self, coll) -> int:
+        started = datetime.utcnow()
+        count = self._load_cursor(coll.find({"embedding": {"$exists": True}}, LOAD_PROJECTION))
+        if self.watermark is None:
+            self.watermark = started
+        return count
+
+    def refresh(self, coll) -> int:
+        # Picks up documents added or re-embedded since the last load
+        if self.watermark is None:
+            return self.load_from_collection(coll)
+        query = {"embedded_at": {"$gte": self.watermark - REFRESH_OVERLAP}}
+        return self._load_cursor(coll.find(query, LOAD_PROJECTION))
+
+    # --- Querying ---
+    def search(self, query_vector, k: int, filters: Optional[dict] = None) -> List[Tuple[object, float]]:
+        # `filters` (region/period/themes) restricts scoring to the rows in their postings
+        with self._lock:
+            matrix = self.matrix
+            ids = self.ids[: len(matrix)]
+            rows = self.filters.rows(filters)
+        if not len(ids) or (rows is not None and not len(rows)):
+            return []
+        q = np.asarray(query_vector, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        scores = (matrix[rows] if rows is not None else matrix) @ q
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        picked = rows[top] if rows is not None else top
+        # Same scale as Atlas vectorSearchScore for cosine: (1 + cos) / 2
+        return [(ids[r], float((1.0 + sc) / 2.0)) for r, sc in zip(picked, scores[top])]
+
+    # --- Snapshots ---
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            # Write aside and rename, so a live memory map of the old snapshot stays valid
+            vectors_tmp = os.path.join(path, "vectors.tmp.npy")
+            np.save(vectors_tmp, self.matrix)
+            meta = {"dim": self.dim, "ids": self.ids, "watermark": self.watermark, "filters": self.filters.to_json()}
+            meta_tmp = os.path.join(path, "meta.json.tmp")
+            with open(meta_tmp, "w") as f:
+                f.write(json_util.dumps(meta))
+            os.replace(vectors_tmp, os.path.join(path, "vectors.npy"))
+            os.replace(meta_tmp, os.path.join(path, "meta.json"))
+
+    @classmethod
+    def load(cls, path: str) -> "LocalVectorIndex":
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json_util.loads(f.read())
+        if "filters" not in meta:
+            return cls()  # Snapshot predates filter postings; rebuild from the collection
+        index = cls(meta["dim"])
+        # Memory-mapped read-only; the first upsert copies into a writable buffer
+        index._matrix = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        index.ids = list(meta["ids"])
+        index._pos = {_id: row for row, _id in enumerate(index.ids)}
+        index.filters = FilterPostings.from_json(meta["filters"])
+        index.watermark = meta.get("watermark")
+        return index
+
+
+# --- Process-wide index used by the "local" vector backend ---
+_index: Optional[LocalVectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index(coll) -> LocalVectorIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                snapshot = VECTOR_INDEX_PATH and os.path.exists(os.path.join(VECTOR_INDEX_PATH, "meta.json"))
+                index = LocalVectorIndex.load(VECTOR_INDEX_PATH) if snapshot else LocalVectorIndex()
+                index.refresh(coll)
+                if VECTOR_INDEX_PATH:
+                    index.save(VECTOR_INDEX_PATH)
+                _index = index
+    return _index
+
+
+def maybe_refresh(coll):
+    index = get_vector_index(coll)
+    if time.time() - index.last_refresh < VECTOR_INDEX_REFRESH_SECONDS:
+        return
+    if _index_lock.acquire(blocking=False):
+        try:
+            index.refresh(coll)
+        finally:
+            _index_lock.release()
@@ -0,0 +1,44 @@
+# Packed BSON vector encoding shared by the query path and the local index.
+# The ai_loader scripts import this module too, so stored and query vectors always match.
+
+import os
+
+import numpy as np
+from bson.binary import Binary, BinaryVectorDtype
+
+# "float32" (default), "int8", "packed_bit", or "list" for legacy arrays of doubles
+EMBEDDING_FORMAT = os.environ.get("EMBEDDING_FORMAT", "float32")
+
+VECTOR_SUBTYPE = 9
+
+
+def encode_vector(vector, fmt: str = EMBEDDING_FORMAT):
+    values = np.asarray(vector, dtype=np.float32)
+    if fmt == "list":
+        return values.tolist()
+    if fmt == "float32":
+        return Binary.from_vector(values.tolist(), BinaryVectorDtype.FLOAT32)
+    if fmt == "int8":
+        # Per-vector scalar quantization; cosine similarity is unaffected by the scale
+        scale = 127.0 / max(float(np.abs(values).max()), 1e-12)
+        return Binary.from_vector(np.round(values * scale).astype(np.int8).tolist(), BinaryVectorDtype.INT8)
+    if fmt == "packed_bit":
+        padding = (-len(values)) % 8
+        return Binary.from_vector(np.packbits(values > 0).tolist(), BinaryVectorDtype.PACKED_BIT, padding)
+    raise ValueError(f"Unknown embedding format '{fmt}'")
+
+
+def decode_vector(stored) -> np.ndarray:
+    # Accepts BSON vectors and legacy lists; always returns float32
+    if isinstance(stored, Binary) and stored.subtype == VECTOR_SUBTYPE:
+        dtype, padding, payload = stored[0:1], stored[1], memoryview(stored)[2:]
+        if dtype == BinaryVectorDtype.FLOAT32.value:
+            return np.frombuffer(payload, dtype="<f4")
+        if dtype == BinaryVectorDtype.INT8.value:
+            return np.frombuffer(payload, dtype=np.int8).astype(np.float32)
+        if dtype == BinaryVectorDtype.PACKED_BIT.value:
+            bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8))
+            bits = bits[: len(bits) - padding]
+            return bits.astype(np.float32) * 2.0 - 1.0
+        raise ValueError(f"Unsupported BSON vector dtype {dtype!r}")
+    return np.asarray(stored, dtype=np.float32)
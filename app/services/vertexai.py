@@ -1,15 +1,41 @@
 # /opt/heritage-lens/app/services/vertexai.py
 
+import os
+import threading
+from typing import List
+
 from vertexai.language_models import TextEmbeddingModel
 
-def embed_query(query: str):
-    # Use the same model as used for batch embedding
-    model = TextEmbeddingModel.from_pretrained("text-embedding-005")  # <-- Replace if you used a different model
-    embeddings = model.get_embeddings([query])
+# Use the same model as used for batch embedding
+EMBED_MODEL = os.environ.get("EMBED_MODEL", "text-embedding-005")
+EMBED_REQUEST_LIMIT = 250  # Max texts per get_embeddings request
+
+# --- Process-wide model handle ---
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = TextEmbeddingModel.from_pretrained(EMBED_MODEL)
+    return _model
+
+def _extract_vector(emb):
     # Extract the vector (should be a list of floats, len 768)
-    if embeddings and hasattr(embeddings[0], "values"):
-        return embeddings[0].values
-    # Fallback for dict/list
-    if isinstance(embeddings, list) and len(embeddings) == 1:
-        return embeddings[0]
-    raise RuntimeError("Failed to create embedding for query")
+    return emb.values if hasattr(emb, "values") else emb
+
+
+class VertexEmbedder:
+    model_name = EMBED_MODEL
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), EMBED_REQUEST_LIMIT):
+            chunk = texts[start:start + EMBED_REQUEST_LIMIT]
+            embeddings = get_model().get_embeddings(chunk)
+            if len(embeddings) != len(chunk):
+                raise RuntimeError("Failed to create embedding for query")
+            vectors.extend(_extract_vector(emb) for emb in embeddings)
+        return vectors
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.executor import run_blocking
+
+WARMUP_RETRY_SECONDS = float(os.environ.get("WARMUP_RETRY_SECONDS", 5))
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Runs blocking warm-up steps in the background and reports whether they all succeeded.
+
+    Failed steps are retried until they pass, so a worker that starts before
+    Mongo or the embedding backend is reachable becomes ready later.
+    """
+
+    def __init__(self, retry_seconds: float = WARMUP_RETRY_SECONDS):
+        self.retry_seconds = retry_seconds
+        self.ready = False
+        self.started = time.monotonic()
+        self.steps: Dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self, steps: List[Tuple[str, Callable[[], object]]]):
+        pending = list(steps)
+        while pending:
+            failed = []
+            for name, fn in pending:
+                started = time.perf_counter()
+                try:
+                    await run_blocking(fn)
+                except Exception as e:
+                    logger.warning("Warm-up step %s failed: %s", name, e)
+                    self.steps[name] = {"ok": False, "error": str(e)}
+                    failed.append((name, fn))
+                else:
+                    self.steps[name] = {"ok": True, "ms": round((time.perf_counter() - started) * 1000.0, 1)}
+            pending = failed
+            if pending:
+                await asyncio.sleep(self.retry_seconds)
+        self.ready = True
+        logger.info("Worker ready after %.1fs", time.monotonic() - self.started)
+
+    def start(self, steps: List[Tuple[str, Callable[[], object]]]):
+        self.started = time.monotonic()
+        self._task = asyncio.ensure_future(self._run(steps))
+
+    async def stop(self):
+        self.ready = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def status(self) -> dict:
+        return {"ready": self.ready, "uptime_seconds": round(time.monotonic() - self.started, 1), "steps": self.steps}
+
+
+readiness = Readiness()
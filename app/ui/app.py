@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
 import json
 import os
 
@@ -236,6 +238,18 @@ st.markdown(
 # ---- App Logic ----
 
 RESULTS_PER_PAGE = 10
+MAX_RESULTS = 50
+SEARCH_MEMO_SIZE = 20      # Recent first pages kept per browser session
+PAGE_CACHE_ENTRIES = 256   # Continuation pages / details shared across sessions
+PAGE_CACHE_TTL = 300
+
+DEFAULT_API_URL = "http://localhost:8000/api/explorer/search"
+try:
+    API_URL = st.secrets.get("API_URL", DEFAULT_API_URL)
+except FileNotFoundError:  # No secrets.toml (local development)
+    API_URL = DEFAULT_API_URL
+API_BASE = API_URL.rsplit("/search", 1)[0]
+STREAM_URL = f"{API_URL}/stream"
 
 if "results" not in st.session_state:
     st.session_state.results = []
@@ -243,12 +257,137 @@ if "page" not in st.session_state:
     st.session_state.page = 0
 if "search_attempted" not in st.session_state:
     st.session_state.search_attempted = False
+if "next_cursor" not in st.session_state:
+    st.session_state.next_cursor = None
+if "total" not in st.session_state:
+    st.session_state.total = 0
+if "details" not in st.session_state:
+    st.session_state.details = {}
+if "search_memo" not in st.session_state:
+    st.session_state.search_memo = OrderedDict()
+if "exports" not in st.session_state:
+    st.session_state.exports = None
+if "search_payload" not in st.session_state:
+    st.session_state.search_payload = None
+
+
+@st.cache_resource
+def http_session():
+    # One keep-alive connection pool per Streamlit server process, shared by all sessions
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(ttl=PAGE_CACHE_TTL, max_entries=PAGE_CACHE_ENTRIES, show_spinner=False)
+def fetch_page(payload):
+    response = http_session().post(API_URL, json=payload, timeout=15)
+    response.raise_for_status()
+    return response.json()
+
+
+def memo_key(payload):
+    return json.dumps(payload, sort_keys=True)
+
+
+def recall_search(payload):
+    memo = st.session_state.search_memo
+    key = memo_key(payload)
+    if key in memo:
+        memo.move_to_end(key)
+        return memo[key]
+    return None
+
+
+def remember_search(payload, data):
+    memo = st.session_state.search_memo
+    memo[memo_key(payload)] = data
+    while len(memo) > SEARCH_MEMO_SIZE:
+        memo.popitem(last=False)
+
+
+def stream_first_page(payload, placeholder):
+    # Renders provisional vector hits while the reranked first page is computed
+    data = {}
+    with http_session().post(STREAM_URL, json=payload, stream=True, timeout=15) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["event"] == "provisional":
+                with placeholder.container():
+                    st.caption("Early matches — refining results...")
+                    for item in event["results"]:
+                        st.markdown(f"**{item.get('title', 'Untitled')}** · {item.get('region', '-')}")
+            elif event["event"] == "final":
+                data = event
+            elif event["event"] == "error":
+                raise RuntimeError(event.get("detail", "Search failed"))
+    placeholder.empty()
+    return data
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_facets():
+    # Filter options; the API serves precomputed counts, refreshed after each data load
+    try:
+        response = http_session().get(f"{API_BASE}/facets", timeout=5)
+        response.raise_for_status()
+        return response.json()
+    except Exception:
+        return {}
+
+
+def facet_options(facets, field):
+    return [f"{item['value']} ({item['count']})" for item in facets.get(field, [])]
+
+
+def option_value(option):
+    return option.rsplit(" (", 1)[0]
+
+
+def build_exports(search_payload):
+    # Only called when the user asks for an export, not on every rerun. Exports hold
+    # every hit (up to MAX_RESULTS) with full records, not just the pages loaded so far.
+    results = fetch_page(search_payload).get("results", [])
+    df = pd.DataFrame(results)
+    return {
+        "count": len(results),
+        "csv": df.to_csv(index=False).encode("utf-8"),
+        "json": json.dumps(results, ensure_ascii=False, indent=2),
+    }
+
+
+@st.cache_data(ttl=PAGE_CACHE_TTL, max_entries=PAGE_CACHE_ENTRIES, show_spinner=False)
+def fetch_details(artifact_id):
+    response = http_session().get(f"{API_BASE}/artifacts/{artifact_id}", timeout=15)
+    response.raise_for_status()
+    return response.json()
+
 
 # Search bar and button
 search_col, btn_col = st.columns([18, 2], gap="small")
 query = search_col.text_input("🔎 Describe an artifact, theme, or cultural region:", label_visibility="collapsed")
 search_clicked = btn_col.button("Search")
 
+# Optional filters, pushed down to both search legs
+facets = fetch_facets()
+filters = {}
+if facets:
+    region_col, period_col, themes_col = st.columns(3)
+    region = region_col.selectbox("Region", ["Any region"] + facet_options(facets, "region"))
+    period = period_col.selectbox("Period", ["Any period"] + facet_options(facets, "period"))
+    themes = themes_col.multiselect("Themes", facet_options(facets, "themes"), placeholder="Any theme")
+    if region != "Any region":
+        filters["region"] = option_value(region)
+    if period != "Any period":
+        filters["period"] = option_value(period)
+    if themes:
+        filters["themes"] = [option_value(t) for t in themes]
+
 # Get results
 results = st.session_state.get("results", [])
 search_attempted = st.session_state.get("search_attempted", False)
@@ -256,7 +395,7 @@ search_attempted = st.session_state.get("search_attempted", False)
 # Info + Export buttons
 info_col, export_col = st.columns([11, 6])  # Wide info, narrow export
 
-count = len(results)  # assuming 'results' is a list
+count = st.session_state.get("total", len(results))
 
 result_text = f"<span class='emoji-glow'> 🔍 </span> {count} result{'s' if count != 1 else ''} found!"
 
@@ -269,15 +408,23 @@ with info_col:
         )
 
 with export_col:
-    if results:
-        df = pd.DataFrame(results)
+    exports = st.session_state.exports
+    if results and exports is None:
+        # Payloads are built on request; a new search clears the prepared export
+        if st.button("📤 Export results", key="prepare_export"):
+            try:
+                st.session_state.exports = build_exports(st.session_state.search_payload)
+                st.rerun()
+            except requests.RequestException as e:
+                st.error(f"Export failed: {e}")
+    elif results:
         btn_csv, btn_json, btn_spacer = st.columns([6, 6, 1])
         with btn_spacer:
             pass  # This pushes both buttons to the right
         with btn_csv:
             st.download_button(
                 label="📤 Export as CSV",
-                data=df.to_csv(index=False).encode("utf-8"),
+                data=exports["csv"],
                 file_name="artifacts.csv",
                 mime="text/csv",
                 key="export_csv"
@@ -285,7 +432,7 @@ with export_col:
         with btn_json:
             st.download_button(
                 label="📦 Export as JSON",
-                data=json.dumps(results, ensure_ascii=False, indent=2),
+                data=exports["json"],
                 file_name="artifacts.json",
                 mime="application/json",
                 key="export_json"
@@ -294,81 +441,120 @@ with export_col:
 if search_clicked and query:
     with st.spinner("🔍 Searching... please wait"):
         try:
-            api_url = st.secrets.get(
-                "API_URL", "http://localhost:8000/api/explorer/search"
-            )
-            response = requests.post(
-                api_url, json={"query": query, "k": 50}, timeout=15
-            )
-            data = response.json()
+            # First page only (streamed); later pages are fetched with the continuation cursor
+            payload = {"query": query, "k": MAX_RESULTS, "page_size": RESULTS_PER_PAGE, **filters}
+            data = recall_search(payload)
+            if data is None:
+                data = stream_first_page(payload, st.empty())
+                if data:
+                    remember_search(payload, data)
             st.session_state.search_attempted = True
-            if response.status_code == 200 and data.get("results"):
+            st.session_state.details = {}
+            st.session_state.exports = None
+            # Unpaged form of the same search, used for exports
+            st.session_state.search_payload = {"query": query, "k": MAX_RESULTS, **filters}
+            if data.get("results"):
                 st.session_state.results = data["results"]
+                st.session_state.next_cursor = data.get("next_cursor")
+                st.session_state.total = data.get("total", len(data["results"]))
+                st.session_state.query = query
                 st.session_state.page = 0
-                st.session_state.search_attempted = True
                 st.rerun()
             else:
                 st.session_state.results = []
-                st.session_state.search_attempted = True
+                st.session_state.next_cursor = None
+                st.session_state.total = 0
                 st.warning("No results found!")
         except Exception as e:
             st.session_state.search_attempted = True
             st.error(f"Error: {e}")
 
-results = st.session_state.get("results", [])
-page = st.session_state.get("page", 0)
+@st.fragment
+def render_results():
+    # Paging and "Show details" rerun only this fragment, not the search bar, filters and exports
+    results = st.session_state.get("results", [])
+    page = st.session_state.get("page", 0)
 
-start = page * RESULTS_PER_PAGE
-end = start + RESULTS_PER_PAGE
+    start = page * RESULTS_PER_PAGE
+    end = start + RESULTS_PER_PAGE
 
-if results:
-    for idx, item in enumerate(results[start:end], start + 1):
-        st.markdown(
-            f"<h3 style='font-family: -apple-system, BlinkMacSystemFont, \"Segoe UI\", Roboto, sans-serif;'>{idx}. {item.get('title', 'Untitled')}</h3>",
-                unsafe_allow_html=True
-        )
+    if results:
+        for idx, item in enumerate(results[start:end], start + 1):
+            st.markdown(
+                f"<h3 style='font-family: -apple-system, BlinkMacSystemFont, \"Segoe UI\", Roboto, sans-serif;'>{idx}. {item.get('title', 'Untitled')}</h3>",
+                    unsafe_allow_html=True
+            )
 
-        cols = st.columns([2, 4])
-        with cols[0]:
-            if item.get("image_url"):
-                st.markdown(
-                    f"<div class='image-container'><img src='{item['image_url']}' class='artifact-image'></div>",
-                    unsafe_allow_html=True,
-                )
-        with cols[1]:
+            cols = st.columns([2, 4])
+            with cols[0]:
+                if item.get("image_url"):
+                    st.markdown(
+                        f"<div class='image-container'><img src='{item['image_url']}' class='artifact-image'></div>",
+                        unsafe_allow_html=True,
+                    )
+            with cols[1]:
+                details = st.session_state.details.get(item["_id"])
 
-            st.markdown(
-    f"""
+                st.markdown(
+        f"""
 - **Region:** {item.get('region', '-')}
 - **Period:** {item.get('period', '-')}
-- **Themes:** {', '.join(item.get('themes', [])) or '-'}
-- **Description:** {item.get('description', '-')}
 """,
-    unsafe_allow_html=True
-)
+        unsafe_allow_html=True
+    )
 
-            if item.get("reference_link"):
-                st.markdown(
-                    f"""
-                    <div style='display: flex; margin-left: 4rem; justify-content: flex-start;'>
-                        <a href='{item['reference_link']}' target='_blank' class='ref-btn'>More Info</a>
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
+                if details is None:
+                    if st.button("Show details", key=f"details_{item['_id']}"):
+                        try:
+                            st.session_state.details[item["_id"]] = fetch_details(item["_id"])
+                            st.rerun(scope="fragment")
+                        except Exception as e:
+                            st.error(f"Error: {e}")
+                else:
+                    st.markdown(
+        f"""
+- **Themes:** {', '.join(details.get('themes', [])) or '-'}
+- **Description:** {details.get('description', '-')}
+""",
+        unsafe_allow_html=True
     )
 
-        st.markdown("---")
-
-    total_pages = (len(results) - 1) // RESULTS_PER_PAGE + 1
-    col_prev, col_spacer, col_next = st.columns([3, 15, 2])
-    with col_prev:
-        if st.button("Previous", disabled=page == 0):
-            st.session_state.page = max(page - 1, 0)
-            st.rerun()
-    with col_next:
-        if st.button("Next", disabled=end >= len(results)):
-            st.session_state.page = min(page + 1, total_pages - 1)
-            st.rerun()
+                    if details.get("reference_link"):
+                        st.markdown(
+                            f"""
+                            <div style='display: flex; margin-left: 4rem; justify-content: flex-start;'>
+                                <a href='{details['reference_link']}' target='_blank' class='ref-btn'>More Info</a>
+                            </div>
+                            """,
+                            unsafe_allow_html=True,
+            )
+
+            st.markdown("---")
+
+        has_more = end < len(results) or st.session_state.next_cursor is not None
+        col_prev, col_spacer, col_next = st.columns([3, 15, 2])
+        with col_prev:
+            if st.button("Previous", disabled=page == 0):
+                st.session_state.page = max(page - 1, 0)
+                st.rerun(scope="fragment")
+        with col_next:
+            if st.button("Next", disabled=not has_more):
+                if end >= len(results):
+                    try:
+                        data = fetch_page({
+                            "query": st.session_state.get("query", query),
+                            "cursor": st.session_state.next_cursor,
+                        })
+                        st.session_state.results = results + data.get("results", [])
+                        st.session_state.next_cursor = data.get("next_cursor")
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+                if end < len(st.session_state.results):
+                    st.session_state.page = page + 1
+                st.rerun(scope="fragment")
+
+
+render_results()
 
 # ---- Footer ----
 st.markdown(
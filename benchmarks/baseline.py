@@ -0,0 +1,56 @@
+# benchmarks/baseline.py
+#
+# Stores benchmark results as {name: value} in a JSON file and flags entries
+# that got worse by more than the tolerance. Lower is better for every metric
+# except names ending in "rps".
+
+import json
+import os
+
+BASELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+TOLERANCE = float(os.environ.get("BENCH_TOLERANCE", 0.2))  # 20% slower counts as a regression
+
+def baseline_path(suite: str) -> str:
+    return os.path.join(BASELINE_DIR, f"baseline_{suite}.json")
+
+def load(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save(path: str, results: dict):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def regressions(results: dict, baseline: dict, tolerance: float = TOLERANCE):
+    found = []
+    for name, value in sorted(results.items()):
+        old = baseline.get(name)
+        if not old:
+            continue
+        change = (value - old) / old
+        if name.endswith("rps"):
+            change = -change
+        if change > tolerance:
+            found.append((name, old, value, change))
+    return found
+
+def check(suite: str, results: dict, update: bool = False, tolerance: float = TOLERANCE) -> int:
+    """Prints regressions against the stored baseline; returns a process exit code."""
+    path = baseline_path(suite)
+    if update:
+        save(path, results)
+        print(f"Baseline written to {path}")
+        return 0
+    baseline = load(path)
+    if not baseline:
+        print(f"No baseline at {path}; rerun with --update-baseline to store one.")
+        return 0
+    found = regressions(results, baseline, tolerance)
+    for name, old, new, change in found:
+        print(f"REGRESSION {name}: {old:.3f} -> {new:.3f} ({change:+.0%})")
+    if not found:
+        print(f"No regressions beyond {tolerance:.0%} against {path}")
+    return 1 if found else 0
@@ -0,0 +1,80 @@
+# benchmarks/lexical_quality.py
+#
+# Compares the in-process BM25 text leg with Atlas $search on the real
+# collection (MONGO_URI / MONGO_DB_NAME / MONGO_COLLECTION). $search is taken
+# as the reference ranking. For each backend it reports overlap@k and NDCG@k
+# of the BM25 ranking, plus latency.
+#
+#   python benchmarks/lexical_quality.py --queries queries.txt --k 20
+#   python benchmarks/lexical_quality.py --sample 200       # queries drawn from stored titles
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.routes.explorer import aggregate, build_text_pipeline
+from app.services.db import artifacts
+from app.services.lexical_index import LexicalIndex, tokenize
+
+def sample_queries(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    queries = []
+    for doc in artifacts.aggregate([{"$sample": {"size": count}}, {"$project": {"title": 1}}]):
+        words = tokenize(doc.get("title", ""))
+        if words:
+            queries.append(" ".join(rng.sample(words, min(len(words), rng.randint(1, 3)))))
+    return queries
+
+def ndcg(reference, ranked, k):
+    # Graded relevance from the reference rank: the reference's first hit is worth the most
+    gain = {doc_id: 1.0 / math.log2(rank + 2) for rank, doc_id in enumerate(reference[:k])}
+    dcg = sum(gain.get(doc_id, 0.0) / math.log2(rank + 2) for rank, doc_id in enumerate(ranked[:k]))
+    ideal = sum(g / math.log2(rank + 2) for rank, g in enumerate(sorted(gain.values(), reverse=True)))
+    return dcg / ideal if ideal else 1.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the BM25 text backend with Atlas $search.")
+    parser.add_argument("--queries", help="File with one query per line")
+    parser.add_argument("--sample", type=int, default=100, help="Queries to draw from stored titles if no file is given")
+    parser.add_argument("--k", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.queries:
+        with open(args.queries) as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = sample_queries(args.sample)
+
+    started = time.perf_counter()
+    index = LexicalIndex()
+    index.load_from_collection(artifacts)
+    print(f"Built BM25 index over {len(index)} artifacts ({len(index.terms)} terms) in {time.perf_counter() - started:.1f}s")
+
+    overlaps, ndcgs, atlas_ms, bm25_ms = [], [], [], []
+    for query in queries:
+        t0 = time.perf_counter()
+        reference = [doc["_id"] for doc in aggregate(build_text_pipeline(query, args.k, {"_id": 1}))]
+        t1 = time.perf_counter()
+        ranked = [_id for _id, _ in index.search(query, args.k)]
+        t2 = time.perf_counter()
+        atlas_ms.append((t1 - t0) * 1000.0)
+        bm25_ms.append((t2 - t1) * 1000.0)
+        if reference:
+            overlaps.append(len(set(reference) & set(ranked)) / min(args.k, len(reference)))
+            ndcgs.append(ndcg(reference, ranked, args.k))
+
+    print(f"{len(queries)} queries, k={args.k} ($search is the reference)")
+    print(f"  overlap@{args.k}: {np.mean(overlaps):.3f}   NDCG@{args.k}: {np.mean(ndcgs):.3f}")
+    for name, latencies in (("$search", atlas_ms), ("bm25", bm25_ms)):
+        p50, p95 = np.percentile(latencies, [50, 95])
+        print(f"  {name:<8} p50={p50:.2f}ms p95={p95:.2f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/load_test.py
+#
+# End-to-end latency and throughput of POST /api/explorer/search.
+# Runs app.main:app under uvicorn in this process against the stand-in from
+# standin.py, seeds each collection size in turn and drives it with an
+# increasing number of concurrent clients.
+#
+#   python benchmarks/load_test.py --sizes 1000,10000 --concurrency 1,8,32
+#   python benchmarks/load_test.py --update-baseline
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+
+# Caches would turn most requests into hits; measure the search path unless asked not to
+if "--warm-cache" not in sys.argv:
+    os.environ.setdefault("SEARCH_CACHE_SIZE", "0")
+    os.environ.setdefault("EMBED_CACHE_SIZE", "0")
+
+import httpx
+import numpy as np
+import uvicorn
+
+import standin
+from baseline import check
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_CONCURRENCY = [1, 4, 16, 64]
+REQUESTS_PER_LEVEL = 400
+K = 20
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def serve(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def drive(url: str, query_mix, concurrency: int, total: int, page_size=None):
+    latencies = []
+    errors = 0
+    next_query = iter(range(total))
+
+    async def client(session):
+        nonlocal errors
+        for i in next_query:
+            payload = {"query": query_mix[i % len(query_mix)], "k": K}
+            if page_size:
+                payload["page_size"] = page_size
+            started = time.perf_counter()
+            response = await session.post(url, json=payload)
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            if response.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*[client(session) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "rps": total / elapsed, "errors": errors}
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the search endpoint against a local stand-in.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated collection sizes (1000000 needs a few GB of RAM with mongomock)")
+    parser.add_argument("--concurrency", default=",".join(map(str, DEFAULT_CONCURRENCY)))
+    parser.add_argument("--requests", type=int, default=REQUESTS_PER_LEVEL, help="Requests per concurrency level")
+    parser.add_argument("--page-size", type=int, default=None, help="Exercise the paged search path")
+    parser.add_argument("--warm-cache", action="store_true", help="Keep the search and embedding caches on")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    levels = [int(c) for c in args.concurrency.split(",")]
+    query_mix = standin.queries(500)
+
+    print(f"Seeding {sizes[0]} artifacts...")
+    app = standin.install(sizes[0])
+    port = free_port()
+    server = serve(app, port)
+    url = f"http://127.0.0.1:{port}/api/explorer/search"
+
+    results = {}
+    try:
+        for n, size in enumerate(sizes):
+            if n:
+                print(f"Seeding {size} artifacts...")
+                standin.reset(size)
+            # First request builds the in-process vector and BM25 indexes; keep it out of the numbers
+            httpx.post(url, json={"query": "warm up", "k": K}, timeout=600)
+            for concurrency in levels:
+                stats = asyncio.run(drive(url, query_mix, concurrency, args.requests, args.page_size))
+                print(f"docs={size:<8} concurrency={concurrency:<4} p50={stats['p50_ms']:.1f}ms "
+                      f"p95={stats['p95_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms rps={stats['rps']:.1f} errors={stats['errors']}")
+                for metric in ("p50_ms", "p95_ms", "p99_ms", "rps"):
+                    results[f"search.docs={size}.c={concurrency}.{metric}"] = stats[metric]
+    finally:
+        server.should_exit = True
+    sys.exit(check("load", results, args.update_baseline))
+
+if __name__ == "__main__":
+    main()
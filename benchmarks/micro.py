@@ -0,0 +1,101 @@
+# benchmarks/micro.py
+#
+# Micro-benchmarks for the CPU-bound pieces of search and loading:
+# merge_results + rerank (combined_score), vector encode/decode, the in-process
+# vector index, and the ai_loader parse/normalize/ingest path.
+#
+#   python benchmarks/micro.py
+#   python benchmarks/micro.py --update-baseline
+
+import argparse
+import io
+import json
+import sys
+import time
+
+import numpy as np
+
+import standin
+from baseline import check
+
+REPEATS = 5
+
+def best_of(fn, repeats: int = REPEATS, number: int = 1) -> float:
+    # Milliseconds per call, best of several runs to damp scheduler noise
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best * 1000.0
+
+def bench_rerank(results: dict):
+    from app.routes.explorer import merge_results
+    from app.services.rerank import RERANK_STRATEGIES, rerank
+    for size in (20, 100, 1000):
+        docs = list(standin.synthetic_artifacts(size))
+        for i, doc in enumerate(docs):
+            doc["_id"] = f"id{i}"
+        vector = [{**d, "vector_score": 1.0 - i / size} for i, d in enumerate(docs)]
+        text = [{**d, "text_score": i / size} for i, d in enumerate(reversed(docs))]
+
+        for strategy in RERANK_STRATEGIES:
+            def run():
+                merged = merge_results([dict(d) for d in vector], [dict(d) for d in text])
+                rerank(merged.values(), "bronze temple mask", 20, strategy)
+            results[f"rerank.{strategy}.n={size}.ms"] = best_of(run, number=max(1, 2000 // size))
+
+def bench_vectors(results: dict):
+    from app.services.vectors import decode_vector, encode_vector
+    vec = np.random.default_rng(0).standard_normal(standin.EMBED_DIM).astype(np.float32)
+    for fmt in ("float32", "int8", "packed_bit", "list"):
+        stored = encode_vector(vec, fmt)
+        results[f"vector.encode.{fmt}.ms"] = best_of(lambda: encode_vector(vec, fmt), number=1000)
+        results[f"vector.decode.{fmt}.ms"] = best_of(lambda: decode_vector(stored), number=1000)
+
+def bench_vector_index(results: dict):
+    from app.services.vector_index import LocalVectorIndex
+    rng = np.random.default_rng(0)
+    for size in (10000, 100000):
+        index = LocalVectorIndex()
+        index.upsert(list(range(size)), rng.standard_normal((size, standin.EMBED_DIM)).astype(np.float32))
+        query = rng.standard_normal(standin.EMBED_DIM).astype(np.float32)
+        results[f"vector_index.search.n={size}.ms"] = best_of(lambda: index.search(query, 20), number=20)
+
+def bench_loaders(results: dict, rows: int = 20000, ingest_rows: int = 2000):
+    import mongomock
+    from ingest_and_embed import ingest_and_embed
+    from load_artifacts_to_mongo import ingest, iter_json_array, normalize_artifact
+    artifacts = list(standin.synthetic_artifacts(rows))
+    payload = json.dumps(artifacts)
+
+    # Microseconds per row
+    ms = best_of(lambda: sum(1 for _ in iter_json_array(io.StringIO(payload))), repeats=3)
+    results["loader.parse_json.us_per_row"] = ms * 1000.0 / rows
+    ms = best_of(lambda: [normalize_artifact(a) for a in artifacts], repeats=3)
+    results["loader.normalize.us_per_row"] = ms * 1000.0 / rows
+
+    # mongomock upserts scan the collection, so keep these small; they track our
+    # per-row overhead, not database throughput
+    subset = artifacts[:ingest_rows]
+    embedder = standin.FakeEmbedder()
+    ms = best_of(lambda: ingest(mongomock.MongoClient().db.artifacts, iter(subset)), repeats=1)
+    results["loader.ingest.us_per_row"] = ms * 1000.0 / ingest_rows
+    ms = best_of(lambda: ingest_and_embed(mongomock.MongoClient().db.artifacts, iter(subset), embedder.embed, embedder.model_name), repeats=1)
+    results["loader.ingest_and_embed.us_per_row"] = ms * 1000.0 / ingest_rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for rerank, vectors and loaders.")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    for bench in (bench_rerank, bench_vectors, bench_vector_index, bench_loaders):
+        bench(results)
+    for name, value in sorted(results.items()):
+        print(f"{name:<45} {value:10.4f}")
+    sys.exit(check("micro", results, args.update_baseline))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/standin.py
+#
+# Wires app.main:app to a local Mongo stand-in and a deterministic fake
+# embedder so the search path can be benchmarked without Atlas or Vertex AI.
+#
+# The database is mongomock (in memory) unless BENCH_MONGO_URI points at a
+# local mongod. Neither supports Atlas $vectorSearch/$search, so both legs run
+# on the in-process indexes (VECTOR_BACKEND=local, TEXT_BACKEND=bm25). Numbers
+# are for comparing revisions of this code on one machine, not for predicting
+# Atlas latency.
+
+import hashlib
+import os
+import random
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "ai_loader"))
+
+os.environ.setdefault("MONGO_DB_NAME", "heritage_lens_bench")
+os.environ.setdefault("MONGO_COLLECTION", "artifacts")
+os.environ["VECTOR_BACKEND"] = "local"
+os.environ["VECTOR_INDEX_PATH"] = ""
+os.environ["TEXT_BACKEND"] = "bm25"
+os.environ["LEXICAL_INDEX_PATH"] = ""
+os.environ.setdefault("SERVER_TIMING", "1")
+
+BENCH_MONGO_URI = os.environ.get("BENCH_MONGO_URI")
+EMBED_DIM = 384  # Same width as all-MiniLM-L6-v2
+
+REGIONS = ["Asia", "Europe", "Africa", "Americas", "Oceania", "Middle East"]
+PERIODS = ["Ancient", "Classical", "Medieval", "Renaissance", "Modern", "Contemporary"]
+THEMES = ["ritual", "trade", "music", "textile", "pottery", "architecture", "script", "warfare", "festival", "cuisine"]
+WORDS = [
+    "mask", "temple", "bronze", "silk", "scroll", "drum", "mosaic", "statue", "manuscript", "tapestry",
+    "vessel", "shrine", "carving", "fresco", "amulet", "loom", "lantern", "dagger", "crown", "coin",
+    "garden", "palace", "mural", "altar", "harp", "bowl", "robe", "tablet", "tomb", "bridge",
+]
+
+
+class FakeEmbedder:
+    """Deterministic unit vectors seeded from the text; no model load, negligible cost."""
+
+    model_name = "bench-fake"
+
+    def __init__(self, dim: int = EMBED_DIM):
+        self.dim = dim
+
+    def embed(self, texts):
+        vectors = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            vec = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            vectors.append((vec / np.linalg.norm(vec)).tolist())
+        return vectors
+
+
+def synthetic_artifacts(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(count):
+        words = rng.sample(WORDS, 3)
+        yield {
+            "title": f"{words[0].title()} {words[1]} #{i}",
+            "description": f"A {words[2]} {words[0]} associated with {rng.choice(THEMES)} in {rng.choice(REGIONS)}.",
+            "region": rng.choice(REGIONS),
+            "period": rng.choice(PERIODS),
+            "themes": rng.sample(THEMES, 2),
+            "image_url": f"https://example.org/img/{i}.jpg",
+            "reference_link": f"https://example.org/artifact/{i}",
+        }
+
+def queries(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [" ".join(rng.sample(WORDS, rng.randint(1, 3))) for _ in range(count)]
+
+def make_client():
+    if BENCH_MONGO_URI:
+        from pymongo import MongoClient
+        return MongoClient(BENCH_MONGO_URI)
+    import mongomock
+    return mongomock.MongoClient()
+
+def copy_projections(coll):
+    # mongomock edits the projection dict it is given, and the app shares module-level
+    # projections across threads, so hand it a copy (pymongo never mutates them)
+    if BENCH_MONGO_URI:
+        return coll
+    for name in ("find", "find_one"):
+        method = getattr(coll, name)
+        def wrapper(filter=None, projection=None, *args, _method=method, **kwargs):
+            return _method(filter, dict(projection) if isinstance(projection, dict) else projection, *args, **kwargs)
+        setattr(coll, name, wrapper)
+    return coll
+
+def seed_collection(coll, count: int, batch_size: int = 10000):
+    from app.services.vectors import encode_vector
+    coll.delete_many({})
+    rng = np.random.default_rng(0)
+    batch = []
+    for doc in synthetic_artifacts(count):
+        vec = rng.standard_normal(EMBED_DIM).astype(np.float32)
+        doc["embedding"] = encode_vector(vec / np.linalg.norm(vec))
+        batch.append(doc)
+        if len(batch) == batch_size:
+            coll.insert_many(batch)
+            batch = []
+    if batch:
+        coll.insert_many(batch)
+    coll.create_index("title")
+    return coll
+
+def install(doc_count: int):
+    """Seeds the stand-in and returns the FastAPI app wired to it."""
+    import app.services.db as db_module
+    client = make_client()
+    db = client[os.environ["MONGO_DB_NAME"]]
+    db_module.client, db_module.db = client, db
+    db_module.artifacts = copy_projections(db[os.environ["MONGO_COLLECTION"]])
+    db_module.meta = db[db_module.META_COLLECTION]
+    seed_collection(db_module.artifacts, doc_count)
+
+    from app.services import embeddings
+    embeddings._backend = FakeEmbedder()
+
+    from app.main import app
+    return app
+
+def reset(doc_count: int):
+    # Reseeds between runs and drops state the app built for the previous size
+    import app.services.db as db_module
+    import app.services.lexical_index as lexical_index
+    import app.services.vector_index as vector_index
+    import app.routes.explorer as explorer
+    seed_collection(db_module.artifacts, doc_count)
+    vector_index._index = None
+    lexical_index._index = None
+    explorer.search_cache.clear()
+    from app.services import embeddings
+    embeddings.query_cache.clear()
@@ -0,0 +1,15 @@
+# tests/conftest.py
+#
+# Puts the repo root on sys.path so tests import app.services.* the same way
+# the API does, and ai_loader/ so the loader scripts import as they do when run. Nothing here connects to Mongo: MongoClient is lazy, and tests
+# that need a collection use mongomock.
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "ai_loader"))
+
+os.environ.setdefault("MONGO_DB_NAME", "heritage_lens_test")
+os.environ.setdefault("MONGO_COLLECTION", "artifacts")
@@ -0,0 +1,21 @@
+from app.services.candidates import MAX_CANDIDATES, MIN_CANDIDATES, CandidatePolicy
+
+
+def make_policy():
+    return CandidatePolicy(meta_coll=None, collection_name="artifacts")
+
+
+def test_tuned_small_k_is_not_raised_to_the_untuned_floor():
+    policy = {5: 40, 20: 120}
+    assert make_policy().num_candidates(5, policy) == 40
+    assert make_policy().num_candidates(3, policy) == 24  # Ratio of the next tuned k up
+    assert make_policy().num_candidates(20, policy) == 120
+
+
+def test_tuned_value_is_floored_at_k_and_capped():
+    assert make_policy().num_candidates(10, {10: 5}) == 10
+    assert make_policy().num_candidates(5000, {100: 1000}) == MAX_CANDIDATES
+
+
+def test_untuned_fallback_keeps_the_minimum():
+    assert make_policy().num_candidates(5, {}) == MIN_CANDIDATES
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from pymongo.errors import OperationFailure, WaitQueueTimeoutError
+
+from app.main import app
+from app.routes import explorer
+from app.routes.explorer import MAX_PAGE_SIZE
+
+client = TestClient(app)  # Not entered, so the lifespan warm-up (Mongo ping) never runs
+
+
+@pytest.mark.parametrize("path", ["/api/explorer/search", "/api/explorer/search/stream"])
+@pytest.mark.parametrize("page_size", [0, -1, MAX_PAGE_SIZE + 1])
+def test_out_of_range_page_size_is_rejected_by_both_routes(path, page_size):
+    response = client.post(path, json={"query": "bronze mask", "page_size": page_size})
+    assert response.status_code == 422
+
+
+def test_closing_the_stream_cancels_both_search_legs(monkeypatch):
+    legs = {}
+
+    async def leg(name, results):
+        legs[name] = asyncio.current_task()
+        if results is None:
+            await asyncio.Event().wait()  # Never lands
+        return results
+
+    async def version():
+        return 0
+
+    async def hydrate(hits, fields):
+        return hits
+
+    monkeypatch.setattr(explorer.collection_version, "current", version)
+    monkeypatch.setattr(explorer, "hydrate", hydrate)
+    monkeypatch.setattr(explorer, "vector_leg", lambda *a, **kw: leg("vector", [{"_id": "a", "title": "Bronze mask", "vector_score": 1.0}]))
+    monkeypatch.setattr(explorer, "text_leg", lambda *a, **kw: leg("text", None))
+
+    async def scenario():
+        request = explorer.QueryRequest(query="bronze mask", k=5)
+        events = explorer.search_events(request, time.monotonic() + 30)
+        first = await events.__anext__()
+        assert '"provisional"' in first
+        await events.aclose()  # What Starlette does when the client disconnects
+        assert legs["text"].cancelled()
+        assert legs["vector"].done()
+        assert explorer.admission.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_pool_wait_timeout_on_one_leg_returns_partial_results(monkeypatch):
+    async def vector_leg(*args, **kwargs):
+        return [{"_id": "a", "title": "Bronze mask", "vector_score": 0.9}]
+
+    async def text_leg(*args, **kwargs):
+        raise WaitQueueTimeoutError("Timed out while checking out a connection from connection pool")
+
+    monkeypatch.setattr(explorer, "vector_leg", vector_leg)
+    monkeypatch.setattr(explorer, "text_leg", text_leg)
+
+    results = asyncio.run(explorer.hybrid_search("bronze mask", 5))
+    response = explorer.with_partial({"results": results}, results)
+    assert response["partial"] is True
+    assert response["missing"] == ["text"]
+    assert [doc["_id"] for doc in response["results"]] == ["a"]
+
+
+def test_non_timeout_backend_error_still_fails_the_search():
+    with pytest.raises(OperationFailure):
+        explorer.combine("bronze mask", 5, [], OperationFailure("bad query"))
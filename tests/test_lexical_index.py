@@ -0,0 +1,44 @@
+import threading
+
+from app.services.lexical_index import LexicalIndex
+
+
+def artifact(i):
+    return {"_id": i, "title": f"Bronze mask {i}", "description": "A ritual mask", "region": "Asia" if i % 2 else "Europe"}
+
+
+def test_search_and_add_can_run_concurrently():
+    index = LexicalIndex()
+    for i in range(200):
+        index.add(artifact(i))
+    errors = []
+    done = threading.Event()
+
+    def writer():
+        try:
+            for i in range(200, 5000):
+                index.add(artifact(i))
+                index.add(artifact(i % 200))  # Re-add: retires the old row
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    def reader():
+        try:
+            while not done.is_set():
+                for _id, _ in index.search("bronze mask", 10, {"region": "Asia"}):
+                    assert _id % 2
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert len(index.ids) == len(index._lengths) == len(index._alive)
+    assert all(index.ids[row] == _id for _id, row in index._pos.items())
+    assert len(index) == 5000
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+import precompute_neighbors
+
+
+def brute_force(matrix, rows, k, columns):
+    scores = matrix[rows] @ matrix[columns].T
+    scores[rows[:, None] == columns[None, :]] = -np.inf
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(scores, order, axis=1), columns[order]
+
+
+@pytest.mark.parametrize("columns", [None, np.array([0, 3, 4, 9, 10, 11, 20, 33, 34, 50])])
+def test_blocked_top_k_matches_brute_force(monkeypatch, columns):
+    monkeypatch.setattr(precompute_neighbors, "MATRIX_BLOCK", 7)  # Several blocks, some smaller than k
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((60, 16)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    rows = np.array([0, 4, 5, 11, 33, 59])
+    all_columns = np.arange(len(matrix)) if columns is None else columns
+
+    scores, cols = precompute_neighbors.top_k_block(matrix, rows, 8, columns)
+    expected_scores, expected_cols = brute_force(matrix, rows, 8, all_columns)
+
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-6)
+    np.testing.assert_array_equal(cols, expected_cols)
+    assert not (cols == rows[:, None]).any()
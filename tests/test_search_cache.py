@@ -0,0 +1,66 @@
+import asyncio
+
+from app.services.search_cache import SearchCache
+
+
+def test_waiter_gets_value_when_owner_is_cancelled():
+    async def scenario():
+        cache = SearchCache()
+        release = asyncio.Event()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return ["hit"]
+
+        owner = asyncio.ensure_future(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0)
+
+        owner.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await waiter == ["hit"]
+        assert owner.cancelled()
+        assert calls == 1
+        assert cache.get("key") == ["hit"]
+        assert cache.stats()["coalesced"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_partial_values_are_shared_but_not_stored():
+    class Partial(list):
+        partial = True
+
+    async def scenario():
+        cache = SearchCache()
+        value = await cache.get_or_compute("key", lambda: asyncio.sleep(0, Partial(["hit"])))
+        assert value == ["hit"]
+        assert cache.get("key") is None
+
+    asyncio.run(scenario())
+
+
+def test_failure_reaches_every_waiter_and_is_not_cached():
+    async def scenario():
+        cache = SearchCache()
+
+        async def compute():
+            await asyncio.sleep(0)
+            raise RuntimeError("backend down")
+
+        results = await asyncio.gather(
+            cache.get_or_compute("key", compute),
+            cache.get_or_compute("key", compute),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert cache.get("key") is None
+        assert "key" not in cache._inflight
+
+    asyncio.run(scenario())